@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the ETL.
+
+Everything here runs without network, OpenAI or a shared database.
+"""
@@ -0,0 +1,237 @@
+# etl/bench/fakes.py
+"""
+Local stand-ins for the ETL's external services.
+
+- FakeOpenAIServer: speaks just enough of POST /v1/chat/completions for
+  parse_with_llm(); answers with the licenses found in the prompt after a
+  configurable latency, and reports token usage like the real API.
+- StaticSiteFixture: serves synthetic license result pages (?page=N) and
+  a WA-style CSV for LicenseScraper.
+
+Both are stdlib ThreadingHTTPServers on 127.0.0.1 with an ephemeral port,
+used as context managers; point the ETL at them via env vars
+(OPENAI_BASE_URL, CA_LICENSE_SEARCH_URL, WA_LICENSE_CSV_URL).
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from etl.bench.synthetic import license_csv, license_page_html
+
+_LICENSE_RE = re.compile(r"License Number:\s*([A-Z]{2}-[A-Z]\d{8})")
+_NAME_RE = re.compile(r"^##\s+(.+)$", re.MULTILINE)
+_ISSUER_RE = re.compile(r"issuer='([A-Z]{2}-[A-Z]+)'")
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _Server:
+    """
+    Runs a ThreadingHTTPServer on a daemon thread for the `with` block.
+    """
+
+    handler_class: type
+
+    def __init__(self) -> None:
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def origin(self) -> str:
+        assert self._httpd is not None, "server not started"
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        handler = type("Handler", (self.handler_class,), {"fixture": self})
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ----------------------------------------------------------------------
+# OpenAI
+# ----------------------------------------------------------------------
+
+
+class _OpenAIHandler(_QuietHandler):
+    fixture: "FakeOpenAIServer"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, b'{"error": {"message": "not found"}}', "application/json")
+            return
+
+        fx = self.fixture
+        fx.sleep()
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        content = json.dumps(fx.licenses_for(prompt))
+        usage = {
+            "prompt_tokens": _estimate_tokens(prompt),
+            "completion_tokens": _estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        with fx._lock:
+            fx.calls += 1
+            fx.prompt_tokens += usage["prompt_tokens"]
+            fx.completion_tokens += usage["completion_tokens"]
+
+        body = {
+            "id": f"chatcmpl-bench-{fx.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "bench"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+        self._send(200, json.dumps(body).encode(), "application/json")
+
+
+class FakeOpenAIServer(_Server):
+    """
+    Fake chat-completions endpoint with latency = latency_s ± jitter_s.
+
+    Extracts "License Number: XX-Y00000000" lines (the synthetic page
+    format) from the prompt and returns them as a JSON array of license
+    objects, so the full parse_with_llm() validation path runs.
+    """
+
+    handler_class = _OpenAIHandler
+
+    def __init__(self, *, latency_s: float = 0.05, jitter_s: float = 0.0, seed: int = 0) -> None:
+        super().__init__()
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.origin}/v1"
+
+    def sleep(self) -> None:
+        with self._lock:
+            delay = self.latency_s + self._rng.uniform(-self.jitter_s, self.jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+
+    def licenses_for(self, prompt: str) -> List[Dict[str, Any]]:
+        issuer_match = _ISSUER_RE.search(prompt)
+        issuer = issuer_match.group(1) if issuer_match else "CA-DCC"
+        numbers = _LICENSE_RE.findall(prompt)
+        names = _NAME_RE.findall(prompt)
+        return [
+            {
+                "license_number": number,
+                "issuer": issuer,
+                "legal_name": names[i] if i < len(names) else None,
+                "dba_name": None,
+                "license_type": None,
+                "status": "Active",
+                "address_line1": None,
+                "address_line2": None,
+                "city": None,
+                "region": number[:2],
+                "postal_code": None,
+                "country": "US",
+                "region_config": {},
+                "visibility": "public",
+            }
+            for i, number in enumerate(numbers)
+        ]
+
+
+# ----------------------------------------------------------------------
+# Static license site
+# ----------------------------------------------------------------------
+
+
+class _SiteHandler(_QuietHandler):
+    fixture: "StaticSiteFixture"
+
+    def do_GET(self) -> None:
+        fx = self.fixture
+        url = urlparse(self.path)
+        if url.path.endswith(".csv"):
+            self._send(200, fx.csv_text.encode(), "text/csv")
+            return
+
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        if page < 1 or page > fx.pages:
+            self._send(404, b"<html><body>No results</body></html>", "text/html")
+            return
+        html = license_page_html(fx.state, page, fx.rows_per_page, seed=fx.seed)
+        self._send(200, html.encode(), "text/html; charset=utf-8")
+
+
+class StaticSiteFixture(_Server):
+    """
+    Serves `pages` synthetic result pages at /search?page=N and the same
+    state's feed as CSV at /licenses.csv.
+    """
+
+    handler_class = _SiteHandler
+
+    def __init__(
+        self,
+        *,
+        state: str = "CA",
+        pages: int = 5,
+        rows_per_page: int = 50,
+        csv_rows: int = 1000,
+        seed: int = 0,
+    ) -> None:
+        super().__init__()
+        self.state = state
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.seed = seed
+        self.csv_text = license_csv(state, csv_rows, seed=seed)
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.origin}/search"
+
+    @property
+    def csv_url(self) -> str:
+        return f"{self.origin}/licenses.csv"
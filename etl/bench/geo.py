@@ -0,0 +1,278 @@
+# etl/bench/geo.py
+"""
+Spatial index benchmark (etl.geo).
+
+Loads N synthetic licences (default 1M) clustered around US metros into
+a DisposablePostgres with COPY, then measures:
+
+  geo_rebuild        PgRepo.rebuild_geo_index(): geohash backfill + all cluster levels
+  geo_upsert         incremental upserts of moved licences (cluster deltas applied in-transaction)
+  viewport:z<zoom>   query_viewport() for random map viewports at each zoom
+  naive:z<zoom>      same viewports as a plain latitude/longitude BETWEEN scan
+
+The naive stages are the "before" numbers: what a bbox query over the raw
+table costs without the geohash index and pre-aggregated clusters.
+
+Run with:
+    python -m etl.bench.geo --points 1000000 --out bench-geo.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+from etl.bench.harness import (
+    BenchSkipped,
+    StageResult,
+    build_report,
+    measure_stage,
+    result_from_latencies,
+    skipped,
+    write_report,
+)
+from etl.bench.synthetic import DEFAULT_STATES
+
+if TYPE_CHECKING:
+    from etl.geo import BBox
+
+# (latitude, longitude, weight): licences concentrate around metros like real data.
+METROS: List[Tuple[float, float, float]] = [
+    (34.05, -118.24, 10),  # Los Angeles
+    (37.77, -122.42, 6),  # San Francisco
+    (32.72, -117.16, 4),  # San Diego
+    (39.74, -104.99, 7),  # Denver
+    (42.36, -71.06, 4),  # Boston
+    (42.33, -83.05, 4),  # Detroit
+    (36.17, -115.14, 5),  # Las Vegas
+    (45.52, -122.68, 6),  # Portland
+    (47.61, -122.33, 5),  # Seattle
+    (41.88, -87.63, 5),  # Chicago
+    (33.45, -112.07, 5),  # Phoenix
+    (43.66, -70.26, 2),  # Portland, ME
+]
+# Share of points scattered uniformly over CONUS instead of around a metro.
+RURAL_SHARE = 0.15
+CONUS = (24.5, -124.8, 49.4, -66.9)
+
+DEFAULT_ZOOMS = (3, 5, 7, 9, 11, 13, 16)
+
+_NAIVE_SQL = """
+SELECT count(*), avg("latitude"), avg("longitude")
+FROM "StateLicense"
+WHERE "latitude" BETWEEN %(south)s AND %(north)s
+  AND "longitude" BETWEEN %(west)s AND %(east)s
+"""
+
+
+def synthetic_points(n: int, *, seed: int = 0) -> Iterator[Tuple[float, float]]:
+    rng = random.Random(seed)
+    weights = [m[2] for m in METROS]
+    south, west, north, east = CONUS
+    for _ in range(n):
+        if rng.random() < RURAL_SHARE:
+            yield rng.uniform(south, north), rng.uniform(west, east)
+            continue
+        lat, lng, _ = rng.choices(METROS, weights)[0]
+        # ~20km core with a long suburban tail.
+        spread = 0.15 if rng.random() < 0.7 else 0.8
+        yield lat + rng.gauss(0, spread), lng + rng.gauss(0, spread * 1.3)
+
+
+_COPY_COLUMNS = (
+    '"stateCode"',
+    '"licenseNumber"',
+    '"licenseType"',
+    '"status"',
+    '"entityName"',
+    '"latitude"',
+    '"longitude"',
+    '"updatedAt"',
+)
+
+
+def _copy_points(url: str, n: int, *, seed: int, batch: int = 100_000) -> None:
+    import psycopg2
+
+    states = DEFAULT_STATES
+    # "updatedAt" has no DB default (Prisma sets it client-side).
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    conn = psycopg2.connect(url)
+    try:
+        with conn, conn.cursor() as cur:
+            buf = io.StringIO()
+
+            def flush() -> None:
+                buf.seek(0)
+                cur.copy_from(buf, '"StateLicense"', columns=_COPY_COLUMNS)
+                buf.seek(0)
+                buf.truncate()
+
+            for i, (lat, lng) in enumerate(synthetic_points(n, seed=seed)):
+                state = states[i % len(states)]
+                buf.write(f"{state}\t{state}-G{i:09d}\tretailer\tactive\tBench Shop {i}\t{lat:.6f}\t{lng:.6f}\t{now}\n")
+                if (i + 1) % batch == 0:
+                    flush()
+            flush()
+            cur.execute('ANALYZE "StateLicense"')
+    finally:
+        conn.close()
+
+
+def random_viewport(rng: random.Random, zoom: int) -> "BBox":
+    """
+    A 1280x800px viewport at `zoom`, centred on a metro most of the time.
+    """
+    from etl.geo import BBox
+
+    width = 360.0 * 1280 / (256 * 2**zoom)
+    height = min(170.0, width * 800 / 1280)
+    if rng.random() < 0.8:
+        lat, lng, _ = rng.choice(METROS)
+        lat += rng.gauss(0, 0.3)
+        lng += rng.gauss(0, 0.3)
+    else:
+        south, west, north, east = CONUS
+        lat, lng = rng.uniform(south, north), rng.uniform(west, east)
+    # Mercator: degrees of latitude per pixel shrink with cos(lat).
+    height *= math.cos(math.radians(lat))
+    return BBox(
+        south=max(-85.0, lat - height / 2),
+        west=max(-180.0, lng - width / 2),
+        north=min(85.0, lat + height / 2),
+        east=min(180.0, lng + width / 2),
+    )
+
+
+def _moved_records(n: int, total: int, *, seed: int) -> List[list]:
+    from etl.db_client import LicenseRecord
+
+    rng = random.Random(seed + 1)
+    states = DEFAULT_STATES
+    batches: List[list] = []
+    batch: list = []
+    for lat, lng in synthetic_points(n, seed=seed + 2):
+        i = rng.randrange(total)
+        state = states[i % len(states)]
+        batch.append(
+            LicenseRecord(
+                state_code=state,
+                license_number=f"{state}-G{i:09d}",
+                license_type="retailer",
+                status="active",
+                entity_name=f"Bench Shop {i}",
+                latitude=lat,
+                longitude=lng,
+            )
+        )
+        if len(batch) == 500:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def run(args: argparse.Namespace) -> List[StageResult]:
+    from etl.bench.pg import DisposablePostgres
+    from etl.db_client import PgRepo
+    from etl.geo import query_viewport
+
+    results: List[StageResult] = []
+    with DisposablePostgres() as pg:
+        t0 = time.perf_counter()
+        _copy_points(pg.url, args.points, seed=args.seed)
+        print(f"loaded {args.points} points in {time.perf_counter() - t0:.1f}s")
+
+        repo = PgRepo(pg.url)
+        try:
+            started = time.perf_counter()
+            backfilled = repo.rebuild_geo_index()
+            elapsed = time.perf_counter() - started
+            results.append(
+                result_from_latencies("geo_rebuild", [elapsed * 1000.0], rows=backfilled, seconds=elapsed)
+            )
+
+            results.append(
+                measure_stage(
+                    "geo_upsert",
+                    repo.upsert_state_licenses,
+                    _moved_records(args.upserts, args.points, seed=args.seed),
+                    memory=False,
+                )
+            )
+
+            rng = random.Random(args.seed)
+            for zoom in args.zooms:
+                boxes = [random_viewport(rng, zoom) for _ in range(args.queries)]
+
+                def indexed(bbox) -> int:
+                    r = query_viewport(repo, bbox, zoom, limit=args.limit)
+                    return len(r.points) if r.precision is None else len(r.clusters)
+
+                results.append(measure_stage(f"viewport:z{zoom}", indexed, boxes, memory=False))
+
+                if args.naive_queries:
+
+                    def naive(bbox) -> int:
+                        with repo._conn() as conn, conn.cursor() as cur:
+                            cur.execute(
+                                _NAIVE_SQL,
+                                {"south": bbox.south, "north": bbox.north, "west": bbox.west, "east": bbox.east},
+                            )
+                            return 1
+
+                    results.append(
+                        measure_stage(f"naive:z{zoom}", naive, boxes[: args.naive_queries], memory=False)
+                    )
+        finally:
+            repo.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--upserts", type=int, default=5000, help="moved licences upserted in geo_upsert")
+    parser.add_argument("--queries", type=int, default=200, help="viewport queries per zoom")
+    parser.add_argument(
+        "--naive-queries",
+        type=int,
+        default=20,
+        help="viewports per zoom for the un-indexed baseline (0 to skip)",
+    )
+    parser.add_argument(
+        "--zooms",
+        type=lambda s: [int(z) for z in s.split(",")],
+        default=list(DEFAULT_ZOOMS),
+        help="comma-separated web-map zoom levels",
+    )
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench-geo.json")
+    args = parser.parse_args()
+
+    try:
+        results = run(args)
+    except BenchSkipped as e:
+        results = [skipped("geo", str(e))]
+
+    params = {k: getattr(args, k) for k in ("points", "upserts", "queries", "naive_queries", "zooms", "limit", "seed")}
+    write_report(build_report(results, params=params), args.out)
+
+    print(f"{'stage':<16} {'ops':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rows/s':>11}")
+    for r in results:
+        if r.skipped:
+            print(f"{r.name:<16} skipped: {r.skipped}")
+            continue
+        print(f"{r.name:<16} {r.ops:>6} {r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.p99_ms:>9.2f} {r.rows_per_s:>11.0f}")
+    print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# etl/bench/harness.py
+"""
+Measurement + reporting helpers shared by the ETL benchmarks.
+
+A stage is a callable run once per "op" (a page, a chunk, a batch); the
+harness times every op, then reports rows/s, latency percentiles and
+peak Python heap (tracemalloc, measured in a separate pass so it doesn't
+skew the timings). Reports are plain JSON so two runs can be diffed with
+`compare()` and a regression fails the run before deploy.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Metrics where bigger is better; everything else is "lower is better".
+HIGHER_IS_BETTER = {"rows_per_s"}
+COMPARED_METRICS = ("rows_per_s", "p50_ms", "p95_ms", "peak_mem_mb")
+
+
+class BenchSkipped(Exception):
+    """
+    Raised by a stage whose optional dependency (openai, crawl4ai, a
+    Postgres binary, ...) isn't available; the stage is reported as
+    skipped instead of failing the suite.
+    """
+
+
+@dataclass
+class StageResult:
+    name: str
+    ops: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    rows_per_s: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    peak_mem_mb: Optional[float] = None
+    skipped: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted sequence.
+    """
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def measure_stage(
+    name: str,
+    op: Callable[[Any], int],
+    inputs: Sequence[Any],
+    *,
+    memory: bool = True,
+) -> StageResult:
+    """
+    Run `op(input)` for every input; `op` returns the number of rows it handled.
+    """
+    latencies: List[float] = []
+    rows = 0
+    started = time.perf_counter()
+    for item in inputs:
+        t0 = time.perf_counter()
+        rows += op(item)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    seconds = time.perf_counter() - started
+
+    result = result_from_latencies(name, latencies, rows=rows, seconds=seconds)
+
+    if memory:
+        tracemalloc.start()
+        try:
+            for item in inputs:
+                op(item)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result.peak_mem_mb = round(peak / (1024 * 1024), 2)
+
+    return result
+
+
+def result_from_latencies(
+    name: str,
+    latencies_ms: List[float],
+    *,
+    rows: int,
+    seconds: float,
+) -> StageResult:
+    """
+    Build a StageResult from per-op latencies collected by the caller
+    (used directly by async stages that can't go through measure_stage).
+    """
+    latencies = sorted(latencies_ms)
+    return StageResult(
+        name=name,
+        ops=len(latencies),
+        rows=rows,
+        seconds=round(seconds, 4),
+        rows_per_s=round(rows / seconds, 1) if seconds else 0.0,
+        p50_ms=round(percentile(latencies, 50), 3),
+        p95_ms=round(percentile(latencies, 95), 3),
+        p99_ms=round(percentile(latencies, 99), 3),
+        max_ms=round(latencies[-1], 3) if latencies else 0.0,
+    )
+
+
+def skipped(name: str, reason: str) -> StageResult:
+    return StageResult(name=name, skipped=reason)
+
+
+def _git_sha() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def build_report(stages: List[StageResult], *, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_sha": _git_sha(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "stages": {s.name: asdict(s) for s in stages},
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    *,
+    tolerance: float = 0.15,
+) -> List[str]:
+    """
+    Return human-readable regressions of `current` vs `baseline`.
+
+    Only stages that ran in both reports are compared; a metric regresses
+    when it is worse than baseline by more than `tolerance` (fractional).
+    """
+    problems: List[str] = []
+    if baseline.get("params") != current.get("params"):
+        problems.append("params differ from baseline; results are not comparable")
+        return problems
+
+    for name, cur in current.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or base.get("skipped") or cur.get("skipped"):
+            continue
+        for metric in COMPARED_METRICS:
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                change = (b - c) / b
+            else:
+                change = (c - b) / b
+            if change > tolerance:
+                problems.append(f"{name}.{metric}: {b} -> {c} ({change:+.0%} worse)")
+    return problems
@@ -0,0 +1,127 @@
+# etl/bench/importtime.py
+"""
+Import-time benchmark for the etl package (`python -X importtime`).
+
+Each entry point is imported in a fresh interpreter; we record its
+cumulative import time and check that it does not pull in heavy
+dependencies it has no use for (e.g. `etl.cli` must not load crawl4ai).
+A leaked heavy import or a blown budget makes the run fail, so this is
+cheap to keep in the benchmark suite / CI.
+
+Run with:
+    python -m etl.bench.importtime [--json] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, FrozenSet, List, Optional
+
+HEAVY = frozenset({"crawl4ai", "playwright", "openai", "httpx", "psycopg2", "requests", "yaml", "pydantic"})
+
+# Entry point -> heavy top-level packages it may legitimately import.
+TARGETS: Dict[str, FrozenSet[str]] = {
+    "etl.cli": frozenset(),
+    "etl.staging": frozenset(),
+    "etl.workers": frozenset(),
+    "etl.db_client": frozenset(),
+    "etl.jobs.sync_us_licenses": frozenset(),
+    "etl.scheduler": frozenset(),
+    "etl.etl_pipeline": frozenset(),
+}
+
+# Cumulative import-time budget per entry point, in milliseconds.
+DEFAULT_BUDGET_MS = 150.0
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Map module name -> cumulative microseconds from -X importtime output.
+
+    Lines look like:  import time:   self [us] | cumulative | imported package
+    """
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cum_us, name = [p.strip() for p in line.replace("import time:", "|", 1).split("|")]
+        cumulative[name] = int(cum_us)
+    return cumulative
+
+
+def measure(module: str) -> Dict[str, int]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(proc.stderr)
+
+
+def run(
+    targets: Optional[Dict[str, FrozenSet[str]]] = None,
+    *,
+    repeat: int = 3,
+    budget_ms: float = DEFAULT_BUDGET_MS,
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for module, allowed in (targets or TARGETS).items():
+        try:
+            samples = [measure(module) for _ in range(repeat)]
+        except RuntimeError as e:
+            results.append({"module": module, "ok": False, "error": str(e)})
+            continue
+
+        loaded = samples[0]
+        heavy = sorted(
+            {name.split(".")[0] for name in loaded} & HEAVY - allowed
+        )
+        ms = statistics.median(s.get(module, 0) for s in samples) / 1000.0
+        slowest = sorted(
+            ((n, us) for n, us in loaded.items() if "." not in n and n != "etl"),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:5]
+        results.append(
+            {
+                "module": module,
+                "ok": not heavy and ms <= budget_ms,
+                "cumulative_ms": round(ms, 2),
+                "budget_ms": budget_ms,
+                "unexpected_heavy_imports": heavy,
+                "slowest_top_level": [{"name": n, "ms": round(us / 1000.0, 2)} for n, us in slowest],
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat, budget_ms=args.budget_ms)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "ok  " if r["ok"] else "FAIL"
+            if "error" in r:
+                print(f"{status} {r['module']:<28} {r['error']}")
+                continue
+            extra = f"  leaked: {', '.join(r['unexpected_heavy_imports'])}" if r["unexpected_heavy_imports"] else ""
+            print(f"{status} {r['module']:<28} {r['cumulative_ms']:>8.2f} ms{extra}")
+
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# etl/bench/pg.py
+"""
+Disposable Postgres for benchmarks.
+
+Two modes, tried in order:
+  1. ETL_BENCH_DATABASE_URL is set -> create a throwaway database on that
+     server (CREATE DATABASE etl_bench_<random>) and drop it afterwards.
+     Point it at the docker-compose `db` service, never at production.
+  2. `initdb` / `pg_ctl` are on PATH -> initdb a cluster in a temp dir,
+     start it on a free port (unix socket in the same dir) and delete it
+     on exit.
+Otherwise BenchSkipped is raised and the DB stages are reported as skipped.
+
+The schema is built by applying prisma/migrations/*/migration.sql in
+order, exactly as `prisma migrate deploy` would, so the benchmarks run
+against the real tables, defaults and indexes.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from typing import Optional
+from urllib.parse import urlparse, urlunparse
+
+from etl.bench.harness import BenchSkipped
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "prisma", "migrations")
+
+
+def migration_sql(migrations_dir: str = MIGRATIONS_DIR) -> str:
+    """
+    Every Prisma migration's SQL, concatenated in (timestamp-prefixed) order.
+    """
+    paths = sorted(glob.glob(os.path.join(migrations_dir, "*", "migration.sql")))
+    if not paths:
+        raise BenchSkipped(f"no Prisma migrations found under {os.path.abspath(migrations_dir)}")
+    parts = []
+    for path in paths:
+        with open(path, encoding="utf-8-sig") as f:
+            parts.append(f.read())
+    return "\n;\n".join(parts)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class DisposablePostgres:
+    """
+    `with DisposablePostgres() as pg: PgRepo(pg.url)`
+    """
+
+    def __init__(self, *, schema: Optional[str] = None) -> None:
+        self.schema = schema
+        self.url: Optional[str] = None
+        self._admin_url: Optional[str] = None
+        self._db_name: Optional[str] = None
+        self._datadir: Optional[str] = None
+
+    def __enter__(self) -> "DisposablePostgres":
+        try:
+            import psycopg2  # noqa: F401
+        except ImportError as e:
+            raise BenchSkipped("psycopg2 is not installed") from e
+
+        server_url = os.getenv("ETL_BENCH_DATABASE_URL")
+        if server_url:
+            self._create_database(server_url)
+        elif shutil.which("initdb") and shutil.which("pg_ctl"):
+            self._start_cluster()
+        else:
+            raise BenchSkipped("no ETL_BENCH_DATABASE_URL and no initdb/pg_ctl on PATH")
+
+        self._execute(self.url, self.schema if self.schema is not None else migration_sql())
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._db_name and self._admin_url:
+            self._execute(self._admin_url, f'DROP DATABASE IF EXISTS "{self._db_name}"', autocommit=True)
+        if self._datadir:
+            subprocess.run(
+                ["pg_ctl", "-D", self._datadir, "-m", "immediate", "stop"],
+                capture_output=True,
+            )
+            shutil.rmtree(self._datadir, ignore_errors=True)
+
+    @staticmethod
+    def _execute(url: str, sql: str, *, autocommit: bool = False) -> None:
+        import psycopg2
+
+        conn = psycopg2.connect(url)
+        try:
+            conn.autocommit = autocommit
+            with conn.cursor() as cur:
+                cur.execute(sql)
+            if not autocommit:
+                conn.commit()
+        finally:
+            conn.close()
+
+    def _create_database(self, server_url: str) -> None:
+        self._admin_url = server_url
+        self._db_name = f"etl_bench_{uuid.uuid4().hex[:12]}"
+        self._execute(server_url, f'CREATE DATABASE "{self._db_name}"', autocommit=True)
+        parts = urlparse(server_url)
+        self.url = urlunparse(parts._replace(path=f"/{self._db_name}"))
+
+    def _start_cluster(self) -> None:
+        self._datadir = tempfile.mkdtemp(prefix="etl-bench-pg-")
+        port = _free_port()
+        subprocess.run(
+            ["initdb", "-D", self._datadir, "-U", "bench", "--auth=trust", "--no-sync"],
+            check=True,
+            capture_output=True,
+        )
+        opts = f"-p {port} -k {self._datadir} -c listen_addresses='' -c fsync=off"
+        subprocess.run(
+            ["pg_ctl", "-D", self._datadir, "-o", opts, "-w", "-l", os.path.join(self._datadir, "log"), "start"],
+            check=True,
+            capture_output=True,
+        )
+        self.url = f"postgresql://bench@/postgres?host={self._datadir}&port={port}"
@@ -0,0 +1,389 @@
+# etl/bench/run.py
+"""
+Offline ETL benchmark suite.
+
+Runs every ETL stage against local stand-ins and writes one JSON report:
+
+  csv_parse / json_parse   synthetic open-data payloads -> rows
+  map_rows                 rows -> LicenseRecord (_map_row_to_license)
+  staging_append           LicenseRecord batches -> local staging log
+  llm_parse                synthetic result pages -> parse_with_llm() vs FakeOpenAIServer
+  llm_parse_chunked        same pages via parse_markdown_page() (prune + chunk + parallel)
+  scrape                   LicenseScraper against StaticSiteFixture (needs crawl4ai + Chromium)
+  pg_upsert / drain        PgRepo + drain_staging into a DisposablePostgres
+  import:<module>          cold import time (etl.bench.importtime)
+
+Stages whose optional dependency is missing are reported as skipped.
+With --baseline, the run fails if any metric regressed by more than
+--tolerance against the baseline report.
+
+Run with:
+    python -m etl.bench.run --out bench.json
+    python -m etl.bench.run --out bench.json --baseline main-bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from etl.bench.harness import (
+    BenchSkipped,
+    StageResult,
+    build_report,
+    compare,
+    load_report,
+    measure_stage,
+    result_from_latencies,
+    skipped,
+    write_report,
+)
+from etl.bench.synthetic import (
+    DEFAULT_STATES,
+    license_csv,
+    license_json,
+    license_page_markdown,
+    synthetic_source,
+)
+
+STAGES = (
+    "csv_parse",
+    "json_parse",
+    "map_rows",
+    "staging_append",
+    "llm_parse",
+    "llm_parse_chunked",
+    "scrape",
+    "pg_upsert",
+    "drain",
+    "imports",
+)
+
+
+class Suite:
+    """
+    Holds the generated workload so later stages reuse earlier outputs
+    (map_rows consumes csv_parse's rows, drain consumes staging_append's log).
+    """
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.states = (DEFAULT_STATES * 4)[: args.states]
+        self.tmpdir = tempfile.mkdtemp(prefix="etl-bench-")
+        self.rows: List[tuple] = []  # (source, [row, ...]) chunks
+        self.records: List[list] = []  # LicenseRecord chunks
+        self.staging = None
+
+    # -----------------------
+    # CPU-only stages
+    # -----------------------
+
+    def csv_parse(self) -> StageResult:
+        from etl.jobs.sync_us_licenses import _parse_payload
+        from etl.workers import split_csv
+
+        chunks = []
+        for state in self.states:
+            src = synthetic_source(state, source_type="csv")
+            for chunk in split_csv(license_csv(state, self.args.rows_per_state), self.args.chunk_rows):
+                chunks.append((src, chunk))
+
+        def op(item) -> int:
+            src, text = item
+            rows = _parse_payload(src, text)
+            return len(rows)
+
+        self.rows = [(src, _parse_payload(src, text)) for src, text in chunks]
+        return measure_stage("csv_parse", op, chunks, memory=self.args.memory)
+
+    def json_parse(self) -> StageResult:
+        from etl.jobs.sync_us_licenses import _parse_payload
+
+        payloads = [
+            (synthetic_source(state, source_type="json"), license_json(state, self.args.rows_per_state, nested=True))
+            for state in self.states
+        ]
+        return measure_stage(
+            "json_parse",
+            lambda item: len(_parse_payload(*item)),
+            payloads,
+            memory=self.args.memory,
+        )
+
+    def map_rows(self) -> StageResult:
+        from etl.jobs.sync_us_licenses import _map_row_to_license
+
+        if not self.rows:
+            self.csv_parse()
+
+        def op(item) -> int:
+            src, rows = item
+            return len([_map_row_to_license(src, r) for r in rows])
+
+        result = measure_stage("map_rows", op, self.rows, memory=self.args.memory)
+        self.records = [[_map_row_to_license(src, r) for r in rows] for src, rows in self.rows]
+        return result
+
+    def staging_append(self) -> StageResult:
+        from etl.staging import StagingLog
+
+        if not self.records:
+            self.map_rows()
+        self.staging = StagingLog(os.path.join(self.tmpdir, "staging.sqlite3"))
+        result = measure_stage(
+            "staging_append",
+            lambda batch: (self.staging.append("state_license", "bench", batch), len(batch))[1],
+            self.records,
+            memory=False,  # a second pass would double the log the drain stage replays
+        )
+        return result
+
+    # -----------------------
+    # Stages with local fakes
+    # -----------------------
+
+    def _llm_stage(self, name: str, parse: Callable[..., Any], **kwargs: Any) -> StageResult:
+        from etl.bench.fakes import FakeOpenAIServer
+
+        pages = [
+            license_page_markdown(self.states[0], page, self.args.rows_per_page)
+            for page in range(1, self.args.pages + 1)
+        ]
+        with FakeOpenAIServer(latency_s=self.args.llm_latency_ms / 1000.0) as fake:
+            with _env(OPENAI_BASE_URL=fake.base_url, OPENAI_API_KEY="bench"):
+                result = measure_stage(
+                    name,
+                    lambda md: len(
+                        parse(md, issuer="CA-DCC", region_hint="California, United States", **kwargs).licenses
+                    ),
+                    pages,
+                    memory=False,
+                )
+            result.extra = {
+                "llm_calls": fake.calls,
+                "prompt_tokens": fake.prompt_tokens,
+                "completion_tokens": fake.completion_tokens,
+                "tokens_per_license": round(
+                    (fake.prompt_tokens + fake.completion_tokens) / result.rows, 1
+                ) if result.rows else None,
+                "llm_latency_ms": self.args.llm_latency_ms,
+            }
+        return result
+
+    def _require_llm(self) -> None:
+        try:
+            import openai  # noqa: F401
+            import pydantic  # noqa: F401
+        except ImportError as e:
+            raise BenchSkipped(f"LLM stages need openai + pydantic: {e}") from e
+
+    def llm_parse(self) -> StageResult:
+        self._require_llm()
+        from etl.parser import parse_with_llm
+
+        return self._llm_stage("llm_parse", parse_with_llm)
+
+    def llm_parse_chunked(self) -> StageResult:
+        self._require_llm()
+        from etl.parser import parse_markdown_page
+
+        return self._llm_stage("llm_parse_chunked", parse_markdown_page, max_chunk_tokens=self.args.chunk_tokens)
+
+    def scrape(self) -> StageResult:
+        from etl.bench.fakes import StaticSiteFixture
+
+        try:
+            from etl.scraper_agent import LicenseScraper
+
+            import crawl4ai  # noqa: F401
+        except ImportError as e:
+            raise BenchSkipped(f"scrape needs crawl4ai: {e}") from e
+
+        async def crawl(search_url: str) -> StageResult:
+            latencies: List[float] = []
+            rows = 0
+            started = time.perf_counter()
+            async with LicenseScraper(min_delay=0.0, max_delay=0.0) as scraper:
+                t0 = time.perf_counter()
+                async for markdown in scraper.scrape_california_pages(
+                    search_url=search_url, max_pages=self.args.pages
+                ):
+                    latencies.append((time.perf_counter() - t0) * 1000.0)
+                    rows += markdown.count("License Number:")
+                    t0 = time.perf_counter()
+            return result_from_latencies("scrape", latencies, rows=rows, seconds=time.perf_counter() - started)
+
+        with StaticSiteFixture(pages=self.args.pages, rows_per_page=self.args.rows_per_page) as site:
+            try:
+                return asyncio.run(crawl(site.search_url))
+            except Exception as e:  # Chromium missing, sandbox restrictions, ...
+                raise BenchSkipped(f"scrape could not start a browser: {e}") from e
+
+    # -----------------------
+    # Database stages
+    # -----------------------
+
+    def _pg_stages(self) -> List[StageResult]:
+        from etl.bench.pg import DisposablePostgres
+        from etl.db_client import PgRepo
+        from etl.jobs.drain_staging import drain_staging
+
+        if self.staging is None:
+            self.staging_append()
+
+        with DisposablePostgres() as pg:
+            repo = PgRepo(pg.url)
+            try:
+                upsert = measure_stage(
+                    "pg_upsert",
+                    lambda batch: repo.upsert_state_licenses(batch),
+                    self.records,
+                    memory=False,
+                )
+                started = time.perf_counter()
+                rows = drain_staging(self.staging, pg_repo=repo, bulk_rows=self.args.chunk_rows)
+                drain = result_from_latencies(
+                    "drain",
+                    [(time.perf_counter() - started) * 1000.0],
+                    rows=rows,
+                    seconds=time.perf_counter() - started,
+                )
+            finally:
+                repo.close()
+        return [upsert, drain]
+
+    def imports(self) -> List[StageResult]:
+        from etl.bench.importtime import run as run_importtime
+
+        results = []
+        for r in run_importtime(repeat=3):
+            name = f"import:{r['module']}"
+            if "error" in r:
+                # A module that no longer imports is a failure, not a skip.
+                results.append(StageResult(name=name, extra={"ok": False, "error": r["error"]}))
+                continue
+            results.append(
+                StageResult(
+                    name=name,
+                    ops=1,
+                    p50_ms=r["cumulative_ms"],
+                    extra={
+                        "ok": r["ok"],
+                        "unexpected_heavy_imports": r["unexpected_heavy_imports"],
+                    },
+                )
+            )
+        return results
+
+    def run(self, stages: List[str]) -> List[StageResult]:
+        results: List[StageResult] = []
+        for name in stages:
+            if name == "drain" and "pg_upsert" in stages:
+                continue  # produced together with pg_upsert
+            fn: Callable[[], Any] = self._pg_stages if name in ("pg_upsert", "drain") else getattr(self, name)
+            try:
+                out = fn()
+            except BenchSkipped as e:
+                out = [skipped(name, str(e))]
+                if name == "pg_upsert" and "drain" in stages:
+                    out.append(skipped("drain", str(e)))
+            results.extend(out if isinstance(out, list) else [out])
+        if self.staging is not None:
+            self.staging.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        return results
+
+
+class _env:
+    """
+    Temporarily set environment variables.
+    """
+
+    def __init__(self, **values: str) -> None:
+        self.values = values
+        self.saved: Dict[str, Any] = {}
+
+    def __enter__(self) -> None:
+        for k, v in self.values.items():
+            self.saved[k] = os.environ.get(k)
+            os.environ[k] = v
+
+    def __exit__(self, *exc: Any) -> None:
+        for k, v in self.saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=4)
+    parser.add_argument("--rows-per-state", type=int, default=20_000)
+    parser.add_argument("--chunk-rows", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=10, help="result pages for llm_parse / scrape")
+    parser.add_argument("--rows-per-page", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--chunk-tokens", type=int, default=1500, help="LLM chunk budget for llm_parse_chunked")
+    parser.add_argument("--only", default=",".join(STAGES), help="comma-separated stages")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc pass")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    results = Suite(args).run(stages)
+    params = {
+        k: getattr(args, k)
+        for k in (
+            "states",
+            "rows_per_state",
+            "chunk_rows",
+            "pages",
+            "rows_per_page",
+            "llm_latency_ms",
+            "chunk_tokens",
+            "memory",
+        )
+    }
+    report = build_report(results, params=params)
+    write_report(report, args.out)
+
+    print(f"{'stage':<34} {'rows/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for r in results:
+        if r.skipped:
+            print(f"{r.name:<34} skipped: {r.skipped}")
+            continue
+        if "error" in r.extra:
+            print(f"{r.name:<34} FAILED: {r.extra['error']}")
+            continue
+        mem = "-" if r.peak_mem_mb is None else f"{r.peak_mem_mb:.2f}"
+        print(f"{r.name:<34} {r.rows_per_s:>11.0f} {r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.p99_ms:>9.2f} {mem:>8}")
+    print(f"\nwrote {args.out}")
+
+    failed = [r.name for r in results if r.extra.get("ok") is False]
+    if failed:
+        print(f"import checks failed: {', '.join(failed)}", file=sys.stderr)
+    if args.baseline:
+        problems = compare(load_report(args.baseline), report, tolerance=args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
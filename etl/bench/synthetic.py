@@ -0,0 +1,153 @@
+# etl/bench/synthetic.py
+"""
+Synthetic license data for benchmarks.
+
+Generates deterministic (seeded) license rows shaped like the open-data
+feeds in etl/sources_us.yml, plus a matching source config so the rows
+go through the real _map_row_to_license() path. Also renders the same
+rows as scraped result pages (HTML, and the Markdown the LLM would see).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_STATES = ["CA", "CO", "MA", "MI", "NV", "OR", "WA", "IL", "AZ", "ME"]
+
+LICENSE_TYPES = ["retailer", "cultivator", "manufacturer", "distributor", "microbusiness", "lab"]
+STATUSES = ["Active", "Active", "Active", "Expired", "Suspended", "Surrendered"]
+CITIES = ["Springfield", "Riverside", "Fairview", "Madison", "Georgetown", "Clinton", "Salem", "Franklin"]
+WORDS = ["Green", "Leaf", "Canna", "Harvest", "Valley", "Peak", "Coast", "Golden", "Farms", "Collective"]
+
+FIELDS = [
+    "state",
+    "license_number",
+    "license_type",
+    "license_status",
+    "business_name",
+    "city",
+    "issue_date",
+    "expiration_date",
+    "premise_address",
+    "county",
+]
+
+
+def synthetic_source(state: str, *, source_type: str = "csv") -> Dict[str, Any]:
+    """
+    A sources_us.yml-style entry for a synthetic state feed.
+    """
+    ext = "csv" if source_type == "csv" else "json"
+    return {
+        "id": f"bench-{state.lower()}-licenses",
+        "enabled": True,
+        "jurisdiction": f"US-{state}",
+        "kind": "license",
+        "source_type": source_type,
+        "endpoint": f"http://127.0.0.1/bench/{state.lower()}.{ext}",
+        "primary_key": "license_number",
+        "source_system": f"BENCH_{state}",
+        "field_mapping": {
+            "state_code": "state",
+            "license_number": "license_number",
+            "license_type": "license_type",
+            "status": "license_status",
+            "entity_name": "business_name",
+            "city": "city",
+            "issued_at": "issue_date",
+            "expires_at": "expiration_date",
+        },
+    }
+
+
+def license_rows(
+    state: str,
+    n: int,
+    *,
+    seed: Optional[int] = 0,
+    start: int = 0,
+) -> Iterator[Dict[str, str]]:
+    rng = random.Random(f"{seed}:{state}:{start}")
+    for i in range(start, start + n):
+        year = rng.randint(2018, 2025)
+        city = rng.choice(CITIES)
+        yield {
+            "state": state,
+            "license_number": f"{state}-{rng.choice('CMRDL')}{i:08d}",
+            "license_type": rng.choice(LICENSE_TYPES),
+            "license_status": rng.choice(STATUSES),
+            "business_name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(['LLC', 'Inc', 'Co'])}",
+            "city": city,
+            "issue_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "expiration_date": f"{year + 1}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "premise_address": f'{rng.randint(1, 9999)} {rng.choice(WORDS)} St, "{city}"',
+            "county": f"{rng.choice(WORDS)} County",
+        }
+
+
+def license_csv(state: str, n: int, *, seed: Optional[int] = 0) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(license_rows(state, n, seed=seed))
+    return buf.getvalue()
+
+
+def license_json(state: str, n: int, *, seed: Optional[int] = 0, nested: bool = False) -> str:
+    rows: List[Dict[str, str]] = list(license_rows(state, n, seed=seed))
+    return json.dumps({"results": rows} if nested else rows)
+
+
+_NAV = ["Home", "Search Licenses", "Apply", "Compliance", "Resources", "About Us", "Contact"]
+
+
+def license_page_markdown(state: str, page: int, rows_per_page: int, *, seed: Optional[int] = 0) -> str:
+    """
+    Markdown shaped like navigate_and_render() output for a results page:
+    nav bar, a results table, then footer/cookie boilerplate.
+    """
+    rows = list(license_rows(state, rows_per_page, seed=seed, start=(page - 1) * rows_per_page))
+    lines = [" | ".join(f"[{n}](https://search.example.gov/{n.lower().replace(' ', '-')})" for n in _NAV), ""]
+    lines.append(f"# License Search Results - page {page}")
+    lines.append("")
+    for r in rows:
+        lines.append(f"## {r['business_name']}")
+        lines.append(f"License Number: {r['license_number']}")
+        lines.append(f"Type: {r['license_type']}  Status: {r['license_status']}")
+        lines.append(f"Address: {r['premise_address']}, {r['city']}, {state}")
+        lines.append(f"Issued: {r['issue_date']}  Expires: {r['expiration_date']}")
+        lines.append("")
+        lines.append("---")
+        lines.append("")
+    lines.append("We use cookies to improve your experience. [Accept](#) [Manage preferences](#)")
+    lines.append("")
+    lines.append("© Department of Cannabis Control | [Privacy](#) | [Accessibility](#) | [Site Map](#)")
+    return "\n".join(lines)
+
+
+def license_page_html(state: str, page: int, rows_per_page: int, *, seed: Optional[int] = 0) -> str:
+    """
+    HTML results page for the static-site scraper fixture.
+    """
+    rows = list(license_rows(state, rows_per_page, seed=seed, start=(page - 1) * rows_per_page))
+    nav = "".join(f'<li><a href="/{n.lower().replace(" ", "-")}">{n}</a></li>' for n in _NAV)
+    cards = "".join(
+        f"<article><h2>{r['business_name']}</h2>"
+        f"<p>License Number: {r['license_number']}</p>"
+        f"<p>Type: {r['license_type']} Status: {r['license_status']}</p>"
+        f"<p>Address: {r['premise_address']}, {r['city']}, {state}</p>"
+        f"<p>Issued: {r['issue_date']} Expires: {r['expiration_date']}</p></article>"
+        for r in rows
+    )
+    return (
+        "<!doctype html><html><head><title>License Search</title></head><body>"
+        f"<nav><ul>{nav}</ul></nav>"
+        f"<main><h1>License Search Results - page {page}</h1>{cards}</main>"
+        '<div class="cookie-banner">We use cookies. <button>Accept</button></div>'
+        "<footer>&copy; Department of Cannabis Control</footer>"
+        "</body></html>"
+    )
@@ -0,0 +1,99 @@
+# etl/bench/workers.py
+"""
+Scaling benchmark for the process-pool mode (etl.workers).
+
+Builds a multi-state synthetic CSV workload, then maps it with 1, 2, 4 ...
+worker processes and reports rows/s and speedup vs the in-process path.
+No network or database: fetch is replaced by the generated text. Each
+result is appended to a throwaway staging log exactly as
+run_us_sources_parallel() does, so the parent's single-writer cost is
+part of the measurement.
+
+Run with:
+    python -m etl.bench.workers --states 8 --rows-per-state 50000 --max-workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from etl.bench.synthetic import DEFAULT_STATES, license_csv, synthetic_source
+from etl.staging import StagingLog
+from etl.workers import WorkUnit, partition_source, process_unit, run_units
+
+
+def build_units(states: List[str], rows_per_state: int, chunk_rows: int) -> List[WorkUnit]:
+    units: List[WorkUnit] = []
+    for state in states:
+        src = synthetic_source(state)
+        units.extend(partition_source(src, license_csv(state, rows_per_state), chunk_rows=chunk_rows))
+    return units
+
+
+def measure(units: List[WorkUnit], workers: int) -> Dict[str, Any]:
+    rows = 0
+    with tempfile.TemporaryDirectory() as tmp, StagingLog(os.path.join(tmp, "staging.sqlite3")) as staging:
+        started = time.perf_counter()
+        results = map(process_unit, units) if workers == 1 else run_units(units, workers=workers)
+        for r in results:
+            staging.append_serialized("state_license", f"{r.source_id}#{r.seq}", r.payload, r.rows)
+            rows += r.rows
+        elapsed = time.perf_counter() - started
+    return {"workers": workers, "rows": rows, "seconds": round(elapsed, 3), "rows_per_s": round(rows / elapsed)}
+
+
+def run(
+    *,
+    states: int = 8,
+    rows_per_state: int = 50_000,
+    chunk_rows: int = 5000,
+    max_workers: int = 0,
+) -> List[Dict[str, Any]]:
+    max_workers = max_workers or os.cpu_count() or 1
+    units = build_units((DEFAULT_STATES * 4)[:states], rows_per_state, chunk_rows)
+
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+
+    results = [measure(units, n) for n in counts]
+    base = results[0]["seconds"]
+    for r in results:
+        r["speedup"] = round(base / r["seconds"], 2)
+        r["efficiency"] = round(r["speedup"] / r["workers"], 2)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=8)
+    parser.add_argument("--rows-per-state", type=int, default=50_000)
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    parser.add_argument("--max-workers", type=int, default=0, help="default: os.cpu_count()")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(
+        states=args.states,
+        rows_per_state=args.rows_per_state,
+        chunk_rows=args.chunk_rows,
+        max_workers=args.max_workers,
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'workers':>7} {'rows/s':>10} {'seconds':>8} {'speedup':>8} {'eff':>5}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['rows_per_s']:>10} {r['seconds']:>8} {r['speedup']:>8} {r['efficiency']:>5}")
+
+
+if __name__ == "__main__":
+    main()
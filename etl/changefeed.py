@@ -0,0 +1,271 @@
+# etl/changefeed.py
+"""
+Change log of license upserts/deletes for the search index.
+
+The upsert paths record every row they write as a compact search
+document + fingerprint. Compared with the last fingerprint we saw for
+that key, each row becomes an insert, an update, or nothing at all
+(unchanged rows are dropped here, which is most of a re-scrape). The
+publisher (etl.jobs.publish_search) then pushes only those deltas to
+Algolia, so index cost tracks churn rather than dataset size.
+
+Fingerprints and the change log live in Postgres ("SearchIndexState",
+"SearchChangeLog"), so every ETL worker diffs against the same state and
+the diff commits in the same transaction as the upsert that caused it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+
+if TYPE_CHECKING:
+    import psycopg2.extensions
+
+    from .db_client import PgRepo
+
+logger = logging.getLogger(__name__)
+
+ChangeOp = Literal["insert", "update", "delete"]
+RecordKind = Literal["state_license", "license_entity"]
+
+# Atomic diff: only rows whose fingerprint changed come out of the upsert
+# (xmax = 0 marks a fresh insert), and only those are logged. Inputs are
+# sorted by objectID so concurrent writers lock state rows in one order.
+_UPSERT_SQL = """
+WITH input AS (
+  SELECT * FROM unnest(%(keys)s::text[], %(fingerprints)s::text[], %(payloads)s::text[])
+    AS t("objectID", "fingerprint", "payload")
+),
+changed AS (
+  INSERT INTO "SearchIndexState" AS s ("objectID", "fingerprint", "updatedAt")
+  SELECT "objectID", "fingerprint", (now() AT TIME ZONE 'UTC') FROM input ORDER BY "objectID"
+  ON CONFLICT ("objectID") DO UPDATE
+    SET "fingerprint" = EXCLUDED."fingerprint", "updatedAt" = EXCLUDED."updatedAt"
+    WHERE s."fingerprint" IS DISTINCT FROM EXCLUDED."fingerprint"
+  RETURNING s."objectID", (s.xmax = 0) AS inserted
+)
+INSERT INTO "SearchChangeLog" ("objectID", "op", "fingerprint", "payload")
+SELECT c."objectID", CASE WHEN c.inserted THEN 'insert' ELSE 'update' END, i."fingerprint", i."payload"::jsonb
+FROM changed c JOIN input i USING ("objectID")
+ORDER BY c."objectID"
+RETURNING "op"
+"""
+
+
+@dataclass
+class Change:
+    seq: int
+    key: str
+    op: ChangeOp
+    fingerprint: Optional[str]
+    document: Optional[Dict[str, Any]]
+
+
+def fingerprint(document: Dict[str, Any]) -> str:
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def state_license_key(state_code: str, license_number: str) -> str:
+    return f"StateLicense:{state_code}:{license_number}"
+
+
+def search_document(kind: RecordKind, row: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Map a LicenseRecord / LicenseEntity dict to (key, search document).
+
+    Only fields the search UI uses go into the document, so changes to
+    e.g. rawData don't count as churn.
+    """
+    if kind == "state_license":
+        key = state_license_key(row["state_code"], row["license_number"])
+        doc: Dict[str, Any] = {
+            "objectID": key,
+            "type": "state_license",
+            "name": row.get("entity_name"),
+            "licenseNumber": row.get("license_number"),
+            "licenseType": row.get("license_type"),
+            "status": row.get("status"),
+            "state": row.get("state_code"),
+            "country": row.get("country_code"),
+            "city": row.get("city"),
+            "sourceSystem": row.get("source_system"),
+        }
+        lat, lng = row.get("latitude"), row.get("longitude")
+    else:
+        key = f"License:{row['issuer']}:{row['license_number']}"
+        doc = {
+            "objectID": key,
+            "type": "license",
+            "name": row.get("dba_name") or row.get("legal_name"),
+            "legalName": row.get("legal_name"),
+            "licenseNumber": row.get("license_number"),
+            "issuer": row.get("issuer"),
+            "licenseType": row.get("license_type"),
+            "status": row.get("status"),
+            "state": row.get("region"),
+            "country": row.get("country"),
+            "city": row.get("city"),
+        }
+        lat = lng = None
+
+    if lat is not None and lng is not None:
+        doc["_geoloc"] = {"lat": lat, "lng": lng}
+    return key, doc
+
+
+class ChangeFeed:
+    """
+    Postgres-backed change log; safe to share across threads.
+
+    Uses the PgRepo that owns it (PgRepo(changefeed=...) binds itself),
+    else opens its own from DATABASE_URL on first use.
+    """
+
+    def __init__(self, repo: Optional["PgRepo"] = None) -> None:
+        self.repo = repo
+        self._owns_repo = False
+
+    def bind(self, repo: "PgRepo") -> None:
+        if self.repo is None:
+            self.repo = repo
+
+    def _get_repo(self) -> "PgRepo":
+        if self.repo is None:
+            from .db_client import PgRepo
+
+            self.repo = PgRepo(pool_size=2)
+            self._owns_repo = True
+        return self.repo
+
+    @contextmanager
+    def _cursor(self, cur: Optional["psycopg2.extensions.cursor"] = None) -> Iterator["psycopg2.extensions.cursor"]:
+        if cur is not None:
+            yield cur
+            return
+        with self._get_repo()._conn() as conn, conn.cursor() as own:
+            yield own
+
+    def close(self) -> None:
+        if self._owns_repo and self.repo is not None:
+            self.repo.close()
+            self.repo = None
+            self._owns_repo = False
+
+    def __enter__(self) -> "ChangeFeed":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # -----------------------
+    # Write side (upsert paths)
+    # -----------------------
+
+    def record_upserts(
+        self,
+        kind: RecordKind,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        cur: Optional["psycopg2.extensions.cursor"] = None,
+    ) -> Dict[str, int]:
+        """
+        Diff upserted rows against stored fingerprints; log inserts/updates.
+
+        Pass the upsert's own `cur` to record in the same transaction;
+        without it the diff commits on its own. Returns op counts.
+        """
+        docs: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for row in rows:
+            key, doc = search_document(kind, row)
+            docs[key] = (fingerprint(doc), doc)
+
+        counts = {"insert": 0, "update": 0, "unchanged": 0}
+        if not docs:
+            return counts
+
+        keys = sorted(docs)
+        params = {
+            "keys": keys,
+            "fingerprints": [docs[k][0] for k in keys],
+            "payloads": [json.dumps(docs[k][1], default=str) for k in keys],
+        }
+        with self._cursor(cur) as c:
+            c.execute(_UPSERT_SQL, params)
+            for (op,) in c.fetchall():
+                counts[op] += 1
+        counts["unchanged"] = len(keys) - counts["insert"] - counts["update"]
+
+        logger.info(
+            "Change feed (%s): %d inserted, %d updated, %d unchanged",
+            kind,
+            counts["insert"],
+            counts["update"],
+            counts["unchanged"],
+        )
+        return counts
+
+    def record_deletes(self, keys: Iterable[str], *, cur: Optional["psycopg2.extensions.cursor"] = None) -> int:
+        items = sorted(set(keys))
+        if not items:
+            return 0
+        with self._cursor(cur) as c:
+            c.execute('DELETE FROM "SearchIndexState" WHERE "objectID" = ANY(%s)', (items,))
+            c.execute(
+                'INSERT INTO "SearchChangeLog" ("objectID", "op") SELECT unnest(%s::text[]), \'delete\'',
+                (items,),
+            )
+        logger.info("Change feed: %d deletes", len(items))
+        return len(items)
+
+    # -----------------------
+    # Read side (publisher)
+    # -----------------------
+
+    def pending(self, *, limit: int = 1000) -> List[Change]:
+        """
+        Oldest unpublished changes in log order.
+
+        A key can appear more than once; the publisher keeps the last
+        entry per key and marks all of them published.
+        """
+        with self._cursor() as c:
+            c.execute(
+                'SELECT "seq", "objectID", "op", "fingerprint", "payload" FROM "SearchChangeLog" '
+                'WHERE "publishedAt" IS NULL ORDER BY "seq" LIMIT %s',
+                (limit,),
+            )
+            rows = c.fetchall()
+        # psycopg2 decodes jsonb into dicts already.
+        return [
+            Change(seq=seq, key=key, op=op, fingerprint=fp, document=payload)
+            for seq, key, op, fp, payload in rows
+        ]
+
+    def pending_count(self) -> int:
+        with self._cursor() as c:
+            c.execute('SELECT COUNT(*) FROM "SearchChangeLog" WHERE "publishedAt" IS NULL')
+            (count,) = c.fetchone()
+        return count
+
+    def mark_published(self, seqs: Iterable[int]) -> None:
+        ids = list(seqs)
+        if not ids:
+            return
+        with self._cursor() as c:
+            c.execute(
+                'UPDATE "SearchChangeLog" SET "publishedAt" = (now() AT TIME ZONE \'UTC\') '
+                'WHERE "seq" = ANY(%s)',
+                (ids,),
+            )
+
+    def compact(self) -> int:
+        # Dead tuples are left to autovacuum.
+        with self._cursor() as c:
+            c.execute('DELETE FROM "SearchChangeLog" WHERE "publishedAt" IS NOT NULL')
+            return c.rowcount
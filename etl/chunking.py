@@ -0,0 +1,254 @@
+# etl/chunking.py
+"""
+Markdown pre-processing before LLM parsing.
+
+navigate_and_render() returns the whole page: nav bars, cookie banners,
+footers and the actual results. Sending all of it in one prompt wastes
+tokens on small pages and blows the context window on big ones. This
+module:
+
+  - prune_markdown(): drops page chrome (link-only nav rows, cookie
+    consent banners, footers, bare images) before the first and after
+    the last record line; table rows, headings and "Field: value" lines
+    are never dropped, so a business called "Cookies" survives.
+  - split_records(): cuts the page on record boundaries (headings,
+    horizontal rules, table rows, paragraphs) without splitting a record.
+  - chunk_markdown(): packs records into chunks under a token budget,
+    repeating a table's header in every chunk that carries its rows.
+
+Token counts use tiktoken when it is installed, else ~4 chars/token.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_TABLE_SEP_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+# "License Number: C10-0000123", "- **Status:** Active"
+_FIELD_RE = re.compile(r"^(?:[-*+]\s+)?\**[A-Za-z][\w .()/#&'-]{0,40}?\**\s*:\s*\**\s+\S")
+
+# Only ever applied to leading / trailing chrome, never inside the records.
+BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"\b(we|this (web)?site) uses? cookies\b",
+        r"\b(accept|allow|reject|decline|manage) (all )?cookies\b",
+        r"\bcookie (policy|notice|settings|preferences|consent)\b",
+        r"\bprivacy (policy|notice)\b",
+        r"\bterms (of (use|service)|and conditions)\b",
+        r"\ball rights reserved\b",
+        r"^\s*(©|&copy;|copyright\b)",
+        r"\bskip to (main )?content\b",
+        r"\bsite ?map\b",
+        r"\b(subscribe|sign up) (to|for) (our )?newsletter\b",
+        r"\bfollow us\b",
+    )
+]
+
+
+@lru_cache(maxsize=1)
+def _token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken  # type: ignore
+
+        enc = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(enc.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: (len(text) + 3) // 4
+
+
+def estimate_tokens(text: str) -> int:
+    return _token_counter()(text)
+
+
+# ----------------------------------------------------------------------
+# Pruning
+# ----------------------------------------------------------------------
+
+
+def _is_record_line(stripped: str) -> bool:
+    return bool(stripped.startswith("|") or _HEADING_RE.match(stripped) or _FIELD_RE.match(stripped))
+
+
+def _is_boilerplate(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or _is_record_line(stripped):
+        return False
+
+    links = _LINK_RE.findall(stripped)
+    text_only = _LINK_RE.sub("", stripped)
+    text_only = re.sub(r"[\s|•·»>/*_-]+", "", text_only)
+
+    # Nav bars / breadcrumbs / image-only lines: nothing but links and separators.
+    if links and not text_only:
+        return True
+    # Short lines that are mostly consent / legal / footer chrome.
+    if len(stripped) < 200 and any(p.search(stripped) for p in BOILERPLATE_PATTERNS):
+        return True
+    return False
+
+
+def prune_markdown(markdown: str) -> str:
+    """
+    Remove page chrome; keep anything that might hold record data.
+
+    Only lines before the first / after the last record line (table row,
+    heading, "Field: value") are candidates, so nothing between records
+    is ever dropped.
+    """
+    lines = markdown.splitlines()
+    record_lines = [i for i, line in enumerate(lines) if _is_record_line(line.strip())]
+    first, last = (record_lines[0], record_lines[-1]) if record_lines else (len(lines), -1)
+
+    out: List[str] = []
+    blank = False
+
+    for i, line in enumerate(lines):
+        if (i < first or i > last) and _is_boilerplate(line):
+            continue
+        if not line.strip():
+            # Collapse runs of blank lines left behind by removed chrome.
+            if not blank and out:
+                out.append("")
+            blank = True
+            continue
+        blank = False
+        out.append(line)
+
+    return "\n".join(out).strip()
+
+
+# ----------------------------------------------------------------------
+# Record splitting + chunking
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class Record:
+    """
+    One record-sized piece of a page. `context` is a table header that
+    must precede the record in whatever chunk it lands in.
+    """
+
+    text: str
+    context: Optional[str] = None
+
+
+def split_records(markdown: str) -> List[Record]:
+    records: List[Record] = []
+    block: List[str] = []
+    lines = markdown.splitlines()
+
+    def flush() -> None:
+        text = "\n".join(block).strip()
+        if text:
+            records.append(Record(text=text))
+        block.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        # Tables: every data row is its own record, header kept as context.
+        if line.lstrip().startswith("|") and i + 1 < len(lines) and _TABLE_SEP_RE.match(lines[i + 1]):
+            flush()
+            header = f"{line}\n{lines[i + 1]}"
+            i += 2
+            while i < len(lines) and lines[i].lstrip().startswith("|"):
+                records.append(Record(text=lines[i], context=header))
+                i += 1
+            continue
+
+        if _RULE_RE.match(line):
+            flush()
+        elif _HEADING_RE.match(line):
+            flush()
+            block.append(line)
+        elif not line.strip():
+            # A blank line ends a paragraph block, but a heading-led record
+            # (## Name / fields / blank / more fields) keeps going until the
+            # next heading or rule.
+            if block and not _HEADING_RE.match(block[0]):
+                flush()
+            elif block:
+                block.append(line)
+        else:
+            block.append(line)
+        i += 1
+
+    flush()
+    return records
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    # A single record larger than the budget: fall back to line packing.
+    parts: List[str] = []
+    current: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > max_tokens:
+            parts.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+
+def chunk_markdown(markdown: str, *, max_tokens: int) -> List[str]:
+    """
+    Pack a (pruned) page into chunks of at most ~max_tokens each.
+
+    Records are never split unless one alone exceeds the budget.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_ctx: Optional[str] = None
+    used = 0
+
+    def flush() -> None:
+        nonlocal current, current_ctx, used
+        if current:
+            chunks.append("\n\n".join(current))
+        current, current_ctx, used = [], None, 0
+
+    for rec in split_records(markdown):
+        text = rec.text
+        join_with_ctx = rec.context is not None and rec.context == current_ctx
+        cost = estimate_tokens(text) + 2
+        if rec.context is not None and not join_with_ctx:
+            cost += estimate_tokens(rec.context) + 2
+
+        if cost > max_tokens:
+            flush()
+            prefix = f"{rec.context}\n" if rec.context else ""
+            chunks.extend(prefix + part for part in _hard_split(text, max_tokens))
+            continue
+
+        if used + cost > max_tokens:
+            flush()
+            join_with_ctx = False
+            if rec.context is not None:
+                cost = estimate_tokens(text) + estimate_tokens(rec.context) + 4
+
+        if join_with_ctx:
+            # Table rows under the same header: one row per line, not paragraphs.
+            current[-1] = f"{current[-1]}\n{text}"
+        elif rec.context is not None:
+            current.append(f"{rec.context}\n{text}")
+            current_ctx = rec.context
+        else:
+            current.append(text)
+            current_ctx = None
+        used += cost
+
+    flush()
+    return chunks
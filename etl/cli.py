@@ -0,0 +1,130 @@
+# etl/cli.py
+"""
+`etl` command-line entry point.
+
+Every subcommand imports its job module on demand, so `python -m etl ca`
+never loads psycopg2/requests/yaml and `python -m etl us` never loads
+crawl4ai/openai. Keep this module's top-level imports to cheap stdlib
+modules (even asyncio is deferred; etl/bench/importtime.py checks this).
+
+Usage:
+    python -m etl ca|wa|de       # one region via the scraper + LLM
+    python -m etl regions        # every ETL_ENABLE_* region (old default)
+    python -m etl us [--workers N] [--config PATH] [--no-reconcile]
+    python -m etl drain          # replay the staging log into Postgres
+    python -m etl publish-search # push search index deltas to Algolia
+    python -m etl geo-rebuild    # backfill geohashes + rebuild map clusters
+    python -m etl schedule       # long-running scheduler
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import List, Optional
+
+
+def _run_region(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from .etl_pipeline import run_regions
+
+    asyncio.run(run_regions([args.command.upper()]))
+
+
+def _run_all_regions(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from .etl_pipeline import main
+
+    asyncio.run(main())
+
+
+def _run_us(args: argparse.Namespace) -> None:
+    from .jobs.sync_us_licenses import run_us_license_etl
+
+    run_us_license_etl(args.config, workers=args.workers, reconcile=args.reconcile)
+
+
+def _run_drain(args: argparse.Namespace) -> None:
+    from .jobs.drain_staging import main
+
+    main()
+
+
+def _run_publish_search(args: argparse.Namespace) -> None:
+    from .jobs.publish_search import main
+
+    main()
+
+
+def _run_geo_rebuild(args: argparse.Namespace) -> None:
+    from .db_client import PgRepo
+
+    repo = PgRepo()
+    try:
+        repo.rebuild_geo_index()
+    finally:
+        repo.close()
+
+
+def _run_schedule(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from .scheduler import main
+
+    asyncio.run(main(args.config))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="etl", description="SmokeTheGlobe license ETL.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for region, label in (("ca", "California DCC"), ("wa", "Washington LCB"), ("de", "German club leads")):
+        p = sub.add_parser(region, help=f"Scrape + parse {label} once")
+        p.set_defaults(func=_run_region)
+
+    p = sub.add_parser("regions", help="Run every region enabled via ETL_ENABLE_*")
+    p.set_defaults(func=_run_all_regions)
+
+    p = sub.add_parser("us", help="Sync US open-data license sources once")
+    p.add_argument("--config", default="etl/sources_us.yml")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for parsing/mapping (default: $ETL_WORKERS or 1).",
+    )
+    p.add_argument(
+        "--no-reconcile",
+        dest="reconcile",
+        action="store_false",
+        help="Skip marking licences that dropped out of their feed.",
+    )
+    p.set_defaults(func=_run_us)
+
+    p = sub.add_parser("drain", help="Replay pending staged batches into Postgres")
+    p.set_defaults(func=_run_drain)
+
+    p = sub.add_parser("publish-search", help="Push pending license changes to the search index")
+    p.set_defaults(func=_run_publish_search)
+
+    p = sub.add_parser("geo-rebuild", help="Backfill geohashes and rebuild the map cluster tables")
+    p.set_defaults(func=_run_geo_rebuild)
+
+    p = sub.add_parser("schedule", help="Run the long-lived per-source scheduler")
+    p.add_argument("--config", default="etl/sources_us.yml")
+    p.set_defaults(func=_run_schedule)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ the SmokeTheGlobe Postgres schema used by Prisma.
 
 Uses:
   - DATABASE_URL   (same as your Next.js app)
+  - SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY (SupabaseRepository only)
+
+Connections come from a small pool that stays open for the life of the
+PgRepo, so long-running workers (etl.scheduler) don't reconnect per batch.
 
 IMPORTANT: This module is designed to respect legal & compliance
 constraints. You are responsible for ensuring that any ETL job that
@@ -15,16 +19,39 @@ calls into it only uses data sources you are allowed to ingest.
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+import zlib
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+from . import geo
+
+# psycopg2 is imported lazily (first connection / first upsert) so that
+# importing LicenseRecord, e.g. in etl.workers processes, stays cheap.
+if TYPE_CHECKING:
+  import psycopg2.extensions
+  from psycopg2.pool import ThreadedConnectionPool
 
-import psycopg2
-from psycopg2.extras import execute_batch
+  from .changefeed import ChangeFeed
+  from .models import LicenseEntity, LLMParseError
 
 logger = logging.getLogger(__name__)
 
+# Licence keys are serialised through this many advisory-lock buckets, so
+# a batch takes at most this many locks however many rows it carries
+# (Postgres' lock table only holds ~64 x max_connections entries).
+LICENSE_LOCK_BUCKETS = 1024
+
+
+def _license_lock_buckets(keys: Iterable[Tuple[str, str]]) -> List[int]:
+  """
+  Sorted advisory-lock buckets for (stateCode, licenseNumber) keys.
+  """
+  return sorted({zlib.crc32(f"{sc}:{ln}".encode("utf-8")) % LICENSE_LOCK_BUCKETS for sc, ln in keys})
+
 
 @dataclass
 class LicenseRecord:
@@ -55,13 +82,106 @@ class PgRepo:
     - (later) "Batch", "CoaDocument", "LabResult", etc.
   """
 
-  def __init__(self, conn_str: Optional[str] = None) -> None:
+  def __init__(
+    self,
+    conn_str: Optional[str] = None,
+    *,
+    pool_size: int = 4,
+    changefeed: Optional["ChangeFeed"] = None,
+  ) -> None:
     self.conn_str = conn_str or os.environ.get("DATABASE_URL")
     if not self.conn_str:
       raise RuntimeError("DATABASE_URL env var is required for ETL PgRepo")
+    self.pool_size = pool_size
+    # When set, upserts are diffed into the search change feed in the
+    # same transaction.
+    self.changefeed = changefeed
+    if changefeed is not None:
+      changefeed.bind(self)
+    self._pool: Optional["ThreadedConnectionPool"] = None
+
+  def _get_pool(self) -> "ThreadedConnectionPool":
+    if self._pool is None:
+      from psycopg2.pool import ThreadedConnectionPool
 
-  def _conn(self):
-    return psycopg2.connect(self.conn_str)
+      self._pool = ThreadedConnectionPool(1, self.pool_size, self.conn_str)
+    return self._pool
+
+  @contextmanager
+  def _conn(self) -> Iterator["psycopg2.extensions.connection"]:
+    """
+    Borrow a pooled connection; commits on success, rolls back on error.
+    """
+    pool = self._get_pool()
+    conn = pool.getconn()
+    try:
+      with conn:
+        yield conn
+    finally:
+      pool.putconn(conn)
+
+  def close(self) -> None:
+    if self._pool is not None:
+      self._pool.closeall()
+      self._pool = None
+
+  # -----------------------
+  # Job leasing
+  # -----------------------
+
+  @contextmanager
+  def lease(self, name: str) -> Iterator[bool]:
+    """
+    Hold a session-level Postgres advisory lock named `name`.
+
+    Yields True if this process got the lease, False if another worker
+    already holds it. The lock is released on exit, and by Postgres
+    automatically if the worker dies, so a crashed run never wedges a job.
+    """
+    pool = self._get_pool()
+    conn = pool.getconn()
+    conn.autocommit = True
+    try:
+      with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+        acquired = bool(cur.fetchone()[0])
+      try:
+        yield acquired
+      finally:
+        if acquired:
+          with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+    finally:
+      conn.autocommit = False
+      pool.putconn(conn)
+
+  def seconds_since_job_finished(self, name: str) -> Optional[float]:
+    """
+    Seconds since any worker last finished job `name` (None if never).
+
+    Measured on the database clock, so workers with skewed clocks agree.
+    """
+    with self._conn() as conn, conn.cursor() as cur:
+      cur.execute(
+        """
+        SELECT EXTRACT(EPOCH FROM ((now() AT TIME ZONE 'UTC') - "lastFinishedAt"))
+        FROM "EtlJobRun" WHERE "name" = %s
+        """,
+        (name,),
+      )
+      row = cur.fetchone()
+    return float(row[0]) if row else None
+
+  def mark_job_finished(self, name: str) -> None:
+    with self._conn() as conn, conn.cursor() as cur:
+      cur.execute(
+        """
+        INSERT INTO "EtlJobRun" ("name", "lastFinishedAt")
+        VALUES (%s, (now() AT TIME ZONE 'UTC'))
+        ON CONFLICT ("name") DO UPDATE SET "lastFinishedAt" = EXCLUDED."lastFinishedAt"
+        """,
+        (name,),
+      )
 
   # -----------------------
   # License upsert
@@ -76,14 +196,69 @@ class PgRepo:
     WARNING: This function assumes the Prisma migration has created
     columns:
       - stateCode, licenseNumber, licenseType, status, entityName
-      - countryCode, regionCode, city, latitude, longitude
+      - countryCode, regionCode, city, latitude, longitude, geohash
       - issuedAt, expiresAt, sourceUrl, sourceSystem, rawData
     """
-    items = list(records)
+    # One row per key (last wins), in key order so concurrent batches
+    # take row locks in the same order.
+    by_key = {(r.state_code, r.license_number): r for r in records}
+    items = [by_key[k] for k in sorted(by_key)]
     if not items:
       return 0
 
+    from psycopg2.extras import Json, execute_batch
+
+    params = [
+      {
+        "state_code": r.state_code,
+        "license_number": r.license_number,
+        "license_type": r.license_type,
+        "status": r.status,
+        "entity_name": r.entity_name,
+        "country_code": r.country_code,
+        "region_code": r.region_code,
+        "city": r.city,
+        "latitude": r.latitude,
+        "longitude": r.longitude,
+        "geohash": geo.maybe_encode(r.latitude, r.longitude),
+        "issued_at": r.issued_at,
+        "expires_at": r.expires_at,
+        "source_url": r.source_url,
+        "source_system": r.source_system,
+        "raw_data": Json(r.raw_data) if r.raw_data is not None else None,
+      }
+      for r in items
+    ]
+
+    keys = ([p["state_code"] for p in params], [p["license_number"] for p in params])
     with self._conn() as conn, conn.cursor() as cur:
+      # Cluster deltas need each licence's previous position, so concurrent
+      # upserts of the same licence (even one that doesn't exist yet) must
+      # not interleave: bucketed transaction locks, taken in bucket order.
+      cur.execute(
+        """
+        SELECT pg_advisory_xact_lock(hashtext('etl:state-license'), k.b)
+        FROM (SELECT b FROM unnest(%s::int[]) AS u(b) ORDER BY b) k
+        """,
+        (_license_lock_buckets(by_key),),
+      )
+      cur.execute(
+        """
+        SELECT s."stateCode", s."licenseNumber", s."geohash", s."latitude", s."longitude"
+        FROM "StateLicense" s
+        JOIN unnest(%s::text[], %s::text[]) AS k(state_code, license_number)
+          ON s."stateCode" = k.state_code AND s."licenseNumber" = k.license_number
+        WHERE s."geohash" IS NOT NULL
+        FOR UPDATE OF s
+        """,
+        keys,
+      )
+      old = {(sc, ln): (g, lat, lng) for sc, ln, g, lat, lng in cur.fetchall()}
+      deltas = geo.cluster_deltas(
+        (old.get((p["state_code"], p["license_number"])), (p["geohash"], p["latitude"], p["longitude"]))
+        for p in params
+      )
+
       execute_batch(
         cur,
         """
@@ -98,11 +273,13 @@ class PgRepo:
           "city",
           "latitude",
           "longitude",
+          "geohash",
           "issuedAt",
           "expiresAt",
           "sourceUrl",
           "sourceSystem",
-          "rawData"
+          "rawData",
+          "updatedAt"
         )
         VALUES (
           %(state_code)s,
@@ -115,11 +292,13 @@ class PgRepo:
           %(city)s,
           %(latitude)s,
           %(longitude)s,
+          %(geohash)s,
           %(issued_at)s,
           %(expires_at)s,
           %(source_url)s,
           %(source_system)s,
-          %(raw_data)s
+          %(raw_data)s,
+          (now() AT TIME ZONE 'UTC')
         )
         ON CONFLICT ("stateCode", "licenseNumber") DO UPDATE SET
           "licenseType"   = EXCLUDED."licenseType",
@@ -130,33 +309,143 @@ class PgRepo:
           "city"          = EXCLUDED."city",
           "latitude"      = EXCLUDED."latitude",
           "longitude"     = EXCLUDED."longitude",
+          "geohash"       = EXCLUDED."geohash",
+          "missingSince"  = NULL,
           "issuedAt"      = EXCLUDED."issuedAt",
           "expiresAt"     = EXCLUDED."expiresAt",
           "sourceUrl"     = EXCLUDED."sourceUrl",
           "sourceSystem"  = EXCLUDED."sourceSystem",
-          "rawData"       = EXCLUDED."rawData";
+          "rawData"       = EXCLUDED."rawData",
+          "updatedAt"     = EXCLUDED."updatedAt";
         """,
-        [
-          {
-            "state_code": r.state_code,
-            "license_number": r.license_number,
-            "license_type": r.license_type,
-            "status": r.status,
-            "entity_name": r.entity_name,
-            "country_code": r.country_code,
-            "region_code": r.region_code,
-            "city": r.city,
-            "latitude": r.latitude,
-            "longitude": r.longitude,
-            "issued_at": r.issued_at,
-            "expires_at": r.expires_at,
-            "source_url": r.source_url,
-            "source_system": r.source_system,
-            "raw_data": r.raw_data,
-          }
-          for r in items
-        ],
+        params,
       )
+      geo.apply_cluster_deltas(cur, deltas)
+      if self.changefeed is not None:
+        self.changefeed.record_upserts("state_license", params, cur=cur)
 
     logger.info("Upserted %d state licenses", len(items))
     return len(items)
+
+  # -----------------------
+  # Spatial index (see etl/geo.py)
+  # -----------------------
+
+  def rebuild_geo_index(self, *, batch_size: int = 10000) -> int:
+    """
+    Backfill missing geohashes, then rebuild every cluster level.
+
+    Needed once after the geohash migration, and after any bulk write
+    that bypassed upsert_state_licenses. Returns rows backfilled.
+    """
+    from psycopg2.extras import execute_values
+
+    backfilled = 0
+    with self._conn() as conn:
+      # Server-side cursor: the backfill streams instead of loading the table.
+      with conn.cursor(name="etl_geo_backfill") as src, conn.cursor() as cur:
+        src.execute(
+          """
+          SELECT "id", "latitude", "longitude"
+          FROM "StateLicense"
+          WHERE "geohash" IS NULL AND "latitude" IS NOT NULL AND "longitude" IS NOT NULL
+          """
+        )
+        while True:
+          rows = src.fetchmany(batch_size)
+          if not rows:
+            break
+          updates = [(i, geo.maybe_encode(lat, lng)) for i, lat, lng in rows]
+          updates = [u for u in updates if u[1] is not None]
+          if updates:
+            execute_values(
+              cur,
+              """
+              UPDATE "StateLicense" AS s SET "geohash" = v.geohash
+              FROM (VALUES %s) AS v(id, geohash)
+              WHERE s."id" = v.id
+              """,
+              updates,
+              page_size=batch_size,
+            )
+          backfilled += len(updates)
+
+      with conn.cursor() as cur:
+        geo.rebuild_clusters(cur)
+
+    logger.info("Rebuilt geo index (%d geohashes backfilled)", backfilled)
+    return backfilled
+
+
+class SupabaseRepository:
+  """
+  Writes LicenseEntity rows (CA / WA / DE region jobs) to the Supabase
+  `licenses` table through PostgREST; no Supabase SDK needed.
+
+  Failed LLM parses go to `etl_failed_parses` for self-healing.
+  """
+
+  def __init__(
+    self,
+    url: Optional[str] = None,
+    service_role_key: Optional[str] = None,
+    *,
+    batch_size: int = 500,
+  ) -> None:
+    self.url = (url or os.environ.get("SUPABASE_URL", "")).rstrip("/")
+    self.key = service_role_key or os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "")
+    if not (self.url and self.key):
+      raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required for the region ETL")
+    self.batch_size = batch_size
+
+  def _post(self, table: str, rows: List[dict], *, on_conflict: Optional[str] = None) -> None:
+    import requests
+
+    prefer = ["return=minimal"]
+    params = {}
+    if on_conflict:
+      prefer.append("resolution=merge-duplicates")
+      params["on_conflict"] = on_conflict
+    resp = requests.post(
+      f"{self.url}/rest/v1/{table}",
+      params=params,
+      headers={
+        "apikey": self.key,
+        "Authorization": f"Bearer {self.key}",
+        "Content-Type": "application/json",
+        "Prefer": ",".join(prefer),
+      },
+      # UUIDs / Decimals aren't JSON-native.
+      data=json.dumps(rows, default=str),
+      timeout=60,
+    )
+    resp.raise_for_status()
+
+  def upsert_licenses(self, licenses: List["LicenseEntity"]) -> int:
+    """
+    Upsert on (issuer, license_number); returns the number of rows sent.
+    """
+    rows = [lic.to_db_dict() for lic in licenses]
+    for i in range(0, len(rows), self.batch_size):
+      self._post("licenses", rows[i : i + self.batch_size], on_conflict="issuer,license_number")
+    logger.info("Upserted %d licenses", len(rows))
+    return len(rows)
+
+  def log_failed_parse(
+    self,
+    *,
+    source: str,
+    url: str,
+    markdown: str,
+    error: "LLMParseError",
+  ) -> None:
+    """
+    Best effort: a logging failure must not abort the scrape.
+    """
+    try:
+      self._post(
+        "etl_failed_parses",
+        [{"source": source, "url": url, "markdown": markdown, "error": error.as_dict()}],
+      )
+    except Exception as e:
+      logger.warning("Could not log failed %s parse (%s): %s", source, url, e)
@@ -4,48 +4,62 @@ Top-level ETL orchestrator.
 
 - Creates a LicenseScraper (Crawl4AI).
 - Scrapes region-specific sources (CA, WA, DE).
-- Uses parse_with_llm() for unstructured sources.
+- Uses parse_markdown_page() for unstructured sources: boilerplate is
+  pruned and big pages are split into token-budgeted chunks parsed in
+  parallel.
 - For WA CSV, either map directly or round-trip via the LLM for normalization.
-- Upserts results into Supabase.
+- Appends every parsed batch to the local staging log first, then
+  drains the log into Supabase (a DB outage leaves batches for replay).
 - Logs failed parses into `etl_failed_parses` for self-healing.
 
+Heavy dependencies (crawl4ai, openai, httpx, psycopg2, pydantic) are only
+imported by the jobs that use them, so the `etl` CLI starts fast for a single region.
+
 Run with:
-    python -m etl.etl_pipeline
+    python -m etl.etl_pipeline     # every enabled region
+    python -m etl ca|wa|de         # one region (see etl/cli.py)
 """
 
 from __future__ import annotations
 
 import asyncio
-import csv
 import logging
 import os
-from io import StringIO
-from typing import List
+from typing import Iterable, List
 
+from .changefeed import ChangeFeed
 from .db_client import SupabaseRepository
-from .models import LLMParseError, LicenseEntity
-from etl.jobs.sync_us_licenses import run_us_license_etl
-from .parser import parse_with_llm
+from .jobs.drain_staging import try_drain_staging
+from .mappers import map_wa_rows
 from .scraper_agent import LicenseScraper
+from .staging import StagingLog
+from .workers import etl_worker_count, map_wa_csv_parallel
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
-async def etl_california(repo: SupabaseRepository, scraper: LicenseScraper) -> None:
+async def etl_california(
+    repo: SupabaseRepository,
+    scraper: LicenseScraper,
+    staging: StagingLog,
+) -> None:
     """
-    Scrape CA license portal pages and upsert them.
+    Scrape CA license portal pages and stage each parsed page for upsert.
     """
-    all_licenses: List[LicenseEntity] = []
+    from .models import LLMParseError
+    from .parser import parse_markdown_page
 
     async for markdown in scraper.scrape_california_pages():
         try:
-            parsed = parse_with_llm(
+            parsed = await asyncio.to_thread(
+                parse_markdown_page,
                 markdown,
                 issuer="CA-DCC",
                 region_hint="California, United States",
             )
-            all_licenses.extend(parsed.licenses)
+            staging.append("license_entity", "CA", parsed.licenses)
+            for chunk, err in parsed.failed_chunks:
+                repo.log_failed_parse(source="CA", url="CA_SEARCH_PAGE", markdown=chunk, error=err)
         except LLMParseError as err:
             repo.log_failed_parse(
                 source="CA",
@@ -54,84 +68,71 @@ async def etl_california(repo: SupabaseRepository, scraper: LicenseScraper) -> N
                 error=err,
             )
 
-    if all_licenses:
-        repo.upsert_licenses(all_licenses)
 
-
-async def etl_washington(repo: SupabaseRepository, scraper: LicenseScraper) -> None:
+async def etl_washington(
+    repo: SupabaseRepository,
+    scraper: LicenseScraper,
+    staging: StagingLog,
+) -> None:
     """
-    Fetch WA LCB CSV/Excel data, normalize, and upsert.
+    Fetch WA LCB CSV/Excel data, normalize, and stage for upsert.
     """
-    csv_text = await scraper.fetch_washington_csv()
-    f = StringIO(csv_text)
-    reader = csv.DictReader(f)
+    from .models import LLMParseError
+    from .parser import parse_with_llm
 
-    licenses: List[LicenseEntity] = []
+    csv_text = await scraper.fetch_washington_csv()
 
-    for row in reader:
-        license_number = row.get("LicenseNumber") or row.get("license_number")
-        if not license_number:
-            continue
+    workers = etl_worker_count()
+    if workers > 1:
+        licenses, failed = await asyncio.to_thread(map_wa_csv_parallel, csv_text, workers=workers)
+    else:
+        licenses, failed = map_wa_rows(csv_text)
 
+    for row, e in failed:
+        markdown = f"WA License Row:\n```csv\n{row}\n```"
         try:
-            lic = LicenseEntity(
-                license_number=license_number,
+            parsed = parse_with_llm(
+                markdown,
                 issuer="WA-LCB",
-                visibility="public",
-                legal_name=row.get("BusinessName") or row.get("name"),
-                dba_name=row.get("DBAName") or row.get("dba_name"),
-                license_type=row.get("LicenseType") or row.get("license_type"),
-                status=row.get("LicenseStatus") or row.get("status"),
-                address_line1=row.get("Address1") or row.get("StreetAddress"),
-                address_line2=row.get("Address2"),
-                city=row.get("City"),
-                region=row.get("State") or "WA",
-                postal_code=row.get("ZipCode"),
-                country="US",
-                region_config={
-                    "county": row.get("County"),
-                    "premise_type": row.get("PremiseType"),
-                },
+                region_hint="Washington State, United States",
             )
-            licenses.append(lic)
-        except Exception as e:
-            markdown = f"WA License Row:\n```csv\n{row}\n```"
-            try:
-                parsed = parse_with_llm(
-                    markdown,
-                    issuer="WA-LCB",
-                    region_hint="Washington State, United States",
-                )
-                licenses.extend(parsed.licenses)
-            except LLMParseError as err:
-                repo.log_failed_parse(
-                    source="WA",
-                    url="WA_CSV_ROW",
-                    markdown=markdown,
-                    error=err,
-                )
-                logger.warning("Failed to parse WA row: %s; error=%s", row, e)
-
-    if licenses:
-        repo.upsert_licenses(licenses)
-
-
-async def etl_germany(repo: SupabaseRepository, scraper: LicenseScraper) -> None:
+            licenses.extend(parsed.licenses)
+        except LLMParseError as err:
+            repo.log_failed_parse(
+                source="WA",
+                url="WA_CSV_ROW",
+                markdown=markdown,
+                error=err,
+            )
+            logger.warning("Failed to parse WA row: %s; error=%s", row, e)
+
+    staging.append("license_entity", "WA", licenses)
+
+
+async def etl_germany(
+    repo: SupabaseRepository,
+    scraper: LicenseScraper,
+    staging: StagingLog,
+) -> None:
     """
     Heuristic scraping for German clubs; mark them as unverified leads.
     """
-    all_licenses: List[LicenseEntity] = []
+    from .models import LLMParseError
+    from .parser import parse_markdown_page
 
     async for markdown in scraper.scrape_germany_club_leads():
         try:
-            parsed = parse_with_llm(
+            parsed = await asyncio.to_thread(
+                parse_markdown_page,
                 markdown,
                 issuer="DE-CLUB",
                 region_hint="Germany; cannabis social clubs / Anbauvereinigung",
             )
             for lic in parsed.licenses:
                 lic.region_config.setdefault("verification_status", "unverified_lead")
-            all_licenses.extend(parsed.licenses)
+            staging.append("license_entity", "DE", parsed.licenses)
+            for chunk, err in parsed.failed_chunks:
+                repo.log_failed_parse(source="DE", url="DE_SEARCH_RESULT", markdown=chunk, error=err)
         except LLMParseError as err:
             repo.log_failed_parse(
                 source="DE",
@@ -140,9 +141,6 @@ async def etl_germany(repo: SupabaseRepository, scraper: LicenseScraper) -> None
                 error=err,
             )
 
-    if all_licenses:
-        repo.upsert_licenses(all_licenses)
-
 
 async def reprocess_failed_parses(repo: SupabaseRepository) -> None:
     """
@@ -151,26 +149,48 @@ async def reprocess_failed_parses(repo: SupabaseRepository) -> None:
     logger.info("Self-healing reprocess_failed_parses() is a stub for now.")
 
 
-async def main() -> None:
+REGION_JOBS = {
+    "CA": etl_california,
+    "WA": etl_washington,
+    "DE": etl_germany,
+}
+
+
+def enabled_regions() -> List[str]:
+    return [r for r in REGION_JOBS if os.getenv(f"ETL_ENABLE_{r}", "1") == "1"]
+
+
+async def run_regions(regions: Iterable[str]) -> None:
     """
-    Run ETL for all configured regions once.
+    Run the given region jobs once, sharing one scraper and staging log.
     """
     repo = SupabaseRepository()
-    async with LicenseScraper() as scraper:
-        tasks = []
+    staging = StagingLog()
+    # The search change feed lives in Postgres; without DATABASE_URL the
+    # region upserts still run, they just aren't published to search.
+    changefeed = ChangeFeed() if os.getenv("DATABASE_URL") else None
+    try:
+        async with LicenseScraper() as scraper:
+            await asyncio.gather(*(REGION_JOBS[r](repo, scraper, staging) for r in regions))
 
-        if os.getenv("ETL_ENABLE_CA", "1") == "1":
-            tasks.append(etl_california(repo, scraper))
-        if os.getenv("ETL_ENABLE_WA", "1") == "1":
-            tasks.append(etl_washington(repo, scraper))
-        if os.getenv("ETL_ENABLE_DE", "1") == "1":
-            tasks.append(etl_germany(repo, scraper))
+            # Scraping never waits on the DB; everything staged above (plus any
+            # batches left over from a previous failed drain) is applied here.
+            try_drain_staging(staging, entity_repo=repo, changefeed=changefeed)
 
-        await asyncio.gather(*tasks)
+            if os.getenv("ETL_ENABLE_SELF_HEALING", "1") == "1":
+                await reprocess_failed_parses(repo)
+    finally:
+        if changefeed is not None:
+            changefeed.close()
 
-        if os.getenv("ETL_ENABLE_SELF_HEALING", "1") == "1":
-            await reprocess_failed_parses(repo)
+
+async def main() -> None:
+    """
+    Run ETL for all configured regions once.
+    """
+    await run_regions(enabled_regions())
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
@@ -0,0 +1,393 @@
+# etl/geo.py
+"""
+Spatial index + viewport queries for StateLicense.
+
+No PostGIS needed: every licence with coordinates gets a geohash
+("StateLicense"."geohash", btree, C collation), and
+"StateLicenseGeoCluster" holds pre-aggregated counts/centroids per
+geohash cell for precisions 1..MAX_CLUSTER_PRECISION.
+
+- A geohash prefix is a rectangle, and every point inside it sorts into
+  one contiguous key range, so a bounding box becomes a handful of btree
+  range scans instead of a full table scan.
+- Clusters are maintained incrementally: each cluster row keeps
+  running sums, and an upsert applies only its rows' moves (old position
+  out, new position in) to the one cell per level they touch. The delta
+  upserts commute, so concurrent writers need only row locks on those
+  cells, not a global lock; rebuild_clusters() recomputes everything.
+
+Query API:
+    query_viewport(repo, BBox(...), zoom) -> ViewportResult
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .db_client import PgRepo
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Geohash precision stored on each StateLicense row (~1.2m cells).
+POINT_PRECISION = 9
+# Finest cluster level; zooms past RAW_POINTS_ZOOM return points instead.
+MAX_CLUSTER_PRECISION = 7
+RAW_POINTS_ZOOM = 15
+# Upper bound on prefix ranges per viewport query.
+MAX_COVER_CELLS = 48
+
+
+@dataclass(frozen=True)
+class BBox:
+    south: float
+    west: float
+    north: float
+    east: float
+
+    def split_antimeridian(self) -> List["BBox"]:
+        if self.west <= self.east:
+            return [self]
+        return [
+            BBox(self.south, self.west, self.north, 180.0),
+            BBox(self.south, -180.0, self.north, self.east),
+        ]
+
+
+@dataclass
+class Cluster:
+    geohash: str
+    count: int
+    latitude: float
+    longitude: float
+
+
+@dataclass
+class Point:
+    id: int
+    state_code: str
+    license_number: str
+    entity_name: str
+    status: str
+    latitude: float
+    longitude: float
+
+
+@dataclass
+class ViewportResult:
+    zoom: int
+    precision: Optional[int]  # None when raw points were returned
+    clusters: List[Cluster] = field(default_factory=list)
+    points: List[Point] = field(default_factory=list)
+    truncated: bool = False
+
+
+# ----------------------------------------------------------------------
+# Geohash math
+# ----------------------------------------------------------------------
+
+
+def encode(latitude: float, longitude: float, precision: int = POINT_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars: List[str] = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def maybe_encode(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    if latitude is None or longitude is None:
+        return None
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        return None
+    return encode(latitude, longitude)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    (height_deg, width_deg) of a geohash cell at `precision`.
+    """
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _grid_span(bbox: BBox, precision: int) -> Tuple[range, range]:
+    # Row/column indices of the cells at `precision` that bbox touches.
+    height, width = cell_size(precision)
+    rows = int(round(180.0 / height))
+    cols = int(round(360.0 / width))
+
+    def span(lo: float, hi: float, origin: float, size: float, n: int) -> range:
+        first = min(n - 1, max(0, math.floor((lo - origin) / size)))
+        last = min(n - 1, max(0, math.floor((hi - origin) / size)))
+        return range(first, last + 1)
+
+    return (
+        span(bbox.south, bbox.north, -90.0, height, rows),
+        span(bbox.west, bbox.east, -180.0, width, cols),
+    )
+
+
+def covering_cells(bbox: BBox, precision: int) -> Set[str]:
+    """
+    Geohash cells at `precision` that intersect `bbox` (no antimeridian wrap).
+    """
+    height, width = cell_size(precision)
+    lat_idx, lon_idx = _grid_span(bbox, precision)
+    # Encode each cell's centre.
+    return {
+        encode(-90.0 + (i + 0.5) * height, -180.0 + (j + 0.5) * width, precision)
+        for i in lat_idx
+        for j in lon_idx
+    }
+
+
+def cover_bbox(bbox: BBox, *, max_precision: int, max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """
+    The finest prefix set (precision <= max_precision) covering `bbox`
+    with at most `max_cells` cells.
+    """
+    parts = bbox.split_antimeridian()
+    for precision in range(max_precision, 0, -1):
+        spans = [_grid_span(b, precision) for b in parts]
+        if sum(len(lat) * len(lon) for lat, lon in spans) > max_cells:
+            continue
+        cells: Set[str] = set()
+        for b in parts:
+            cells |= covering_cells(b, precision)
+        return sorted(cells)
+    return list(_BASE32)
+
+
+def zoom_to_precision(zoom: int) -> int:
+    """
+    Web-map zoom (0-22) -> cluster precision; ~one cluster per 64-128px tile.
+    """
+    return max(1, min(MAX_CLUSTER_PRECISION, (zoom + 1) // 2))
+
+
+def prefix_ranges(prefixes: Iterable[str]) -> Tuple[List[str], List[str]]:
+    # Under C collation every key with prefix p sorts in [p, p + '~').
+    lows = sorted(set(prefixes))
+    return lows, [p + "~" for p in lows]
+
+
+# (geohash, latitude, longitude) of one licence, as stored.
+GeoPoint = Tuple[Optional[str], Optional[float], Optional[float]]
+# (precision, cell) -> [count, latitude sum, longitude sum]
+ClusterDeltas = Dict[Tuple[int, str], List[float]]
+
+
+def cluster_deltas(moves: Iterable[Tuple[Optional[GeoPoint], Optional[GeoPoint]]]) -> ClusterDeltas:
+    """
+    Net cluster changes for a batch of (old, new) licence positions.
+
+    `old` is None for a new licence; points without a geohash don't count.
+    """
+    deltas: ClusterDeltas = {}
+    for old, new in moves:
+        if old == new:
+            continue
+        for point, sign in ((old, -1), (new, 1)):
+            if point is None:
+                continue
+            geohash, lat, lng = point
+            if not geohash or lat is None or lng is None:
+                continue
+            for p in range(1, MAX_CLUSTER_PRECISION + 1):
+                d = deltas.setdefault((p, geohash[:p]), [0, 0.0, 0.0])
+                d[0] += sign
+                d[1] += sign * lat
+                d[2] += sign * lng
+    return {k: d for k, d in deltas.items() if any(d)}
+
+
+# ----------------------------------------------------------------------
+# Cluster maintenance
+# ----------------------------------------------------------------------
+
+
+# Rows are applied in (precision, geohash) order so concurrent batches
+# lock shared cells in the same order.
+_APPLY_SQL = """
+INSERT INTO "StateLicenseGeoCluster" AS c
+  ("precision", "geohash", "count", "latitudeSum", "longitudeSum", "latitude", "longitude")
+SELECT d.p, d.g, d.n, d.lat, d.lng, COALESCE(d.lat / NULLIF(d.n, 0), 0), COALESCE(d.lng / NULLIF(d.n, 0), 0)
+FROM unnest(%(p)s::int[], %(g)s::text[], %(n)s::int[], %(lat)s::float8[], %(lng)s::float8[]) AS d(p, g, n, lat, lng)
+ORDER BY d.p, d.g
+ON CONFLICT ("precision", "geohash") DO UPDATE SET
+  "count"        = c."count" + EXCLUDED."count",
+  "latitudeSum"  = c."latitudeSum" + EXCLUDED."latitudeSum",
+  "longitudeSum" = c."longitudeSum" + EXCLUDED."longitudeSum",
+  "latitude"     = COALESCE((c."latitudeSum" + EXCLUDED."latitudeSum") / NULLIF(c."count" + EXCLUDED."count", 0), 0),
+  "longitude"    = COALESCE((c."longitudeSum" + EXCLUDED."longitudeSum") / NULLIF(c."count" + EXCLUDED."count", 0), 0)
+"""
+
+_PRUNE_SQL = """
+DELETE FROM "StateLicenseGeoCluster" c
+USING unnest(%(p)s::int[], %(g)s::text[]) AS d(p, g)
+WHERE c."precision" = d.p AND c."geohash" = d.g AND c."count" <= 0
+"""
+
+_FINEST_SQL = """
+INSERT INTO "StateLicenseGeoCluster"
+  ("precision", "geohash", "count", "latitudeSum", "longitudeSum", "latitude", "longitude")
+SELECT %(p)s, left("geohash", %(p)s), count(*), sum("latitude"), sum("longitude"), avg("latitude"), avg("longitude")
+FROM "StateLicense"
+WHERE "geohash" IS NOT NULL AND "latitude" IS NOT NULL AND "longitude" IS NOT NULL
+GROUP BY 2
+"""
+
+_ROLLUP_SQL = """
+INSERT INTO "StateLicenseGeoCluster"
+  ("precision", "geohash", "count", "latitudeSum", "longitudeSum", "latitude", "longitude")
+SELECT %(p)s, left("geohash", %(p)s), sum("count"), sum("latitudeSum"), sum("longitudeSum"),
+       sum("latitudeSum") / sum("count"), sum("longitudeSum") / sum("count")
+FROM "StateLicenseGeoCluster"
+WHERE "precision" = %(child)s
+GROUP BY 2
+"""
+
+
+def apply_cluster_deltas(cur, deltas: ClusterDeltas) -> None:
+    """
+    Add cluster_deltas() to the cluster table; drops cells that empty out.
+
+    Runs on the caller's cursor so it commits with the upsert.
+    """
+    if not deltas:
+        return
+    keys = sorted(deltas)
+    params = {
+        "p": [p for p, _ in keys],
+        "g": [g for _, g in keys],
+        "n": [int(deltas[k][0]) for k in keys],
+        "lat": [deltas[k][1] for k in keys],
+        "lng": [deltas[k][2] for k in keys],
+    }
+    cur.execute(_APPLY_SQL, params)
+    cur.execute(_PRUNE_SQL, params)
+
+
+def rebuild_clusters(cur) -> None:
+    """
+    Recompute every cluster level from the base table.
+
+    Holds an EXCLUSIVE lock on the cluster table (readers still work) so
+    no delta lands between the wipe and the re-aggregation.
+    """
+    cur.execute('LOCK TABLE "StateLicenseGeoCluster" IN EXCLUSIVE MODE')
+    cur.execute('DELETE FROM "StateLicenseGeoCluster"')
+    for p in range(MAX_CLUSTER_PRECISION, 0, -1):
+        cur.execute(_FINEST_SQL if p == MAX_CLUSTER_PRECISION else _ROLLUP_SQL, {"p": p, "child": p + 1})
+
+
+# ----------------------------------------------------------------------
+# Viewport queries
+# ----------------------------------------------------------------------
+
+
+_CLUSTERS_SQL = """
+SELECT c."geohash", c."count", c."latitude", c."longitude"
+FROM "StateLicenseGeoCluster" c
+JOIN unnest(%(lo)s::text[], %(hi)s::text[]) AS r(lo, hi)
+  ON c."geohash" >= r.lo AND c."geohash" < r.hi
+WHERE c."precision" = %(p)s
+  AND c."latitude" BETWEEN %(south)s AND %(north)s
+  AND {lon_filter}
+LIMIT %(limit)s
+"""
+
+_POINTS_SQL = """
+SELECT s."id", s."stateCode", s."licenseNumber", s."entityName", s."status", s."latitude", s."longitude"
+FROM "StateLicense" s
+JOIN unnest(%(lo)s::text[], %(hi)s::text[]) AS r(lo, hi)
+  ON s."geohash" >= r.lo AND s."geohash" < r.hi
+WHERE s."latitude" BETWEEN %(south)s AND %(north)s
+  AND {lon_filter}
+LIMIT %(limit)s
+"""
+
+
+def _lon_filter(alias: str, bbox: BBox) -> str:
+    col = f'{alias}."longitude"'
+    if bbox.west <= bbox.east:
+        return f"{col} BETWEEN %(west)s AND %(east)s"
+    return f"({col} >= %(west)s OR {col} <= %(east)s)"
+
+
+def query_viewport(
+    repo: "PgRepo",
+    bbox: BBox,
+    zoom: int,
+    *,
+    limit: int = 5000,
+) -> ViewportResult:
+    """
+    Clustered (or, at street zoom, raw) licences inside `bbox`.
+
+    Uses only index range scans on geohash prefixes covering the box.
+    """
+    raw = zoom >= RAW_POINTS_ZOOM
+    precision = None if raw else zoom_to_precision(zoom)
+    cover = cover_bbox(bbox, max_precision=POINT_PRECISION if raw else precision)
+    lo, hi = prefix_ranges(cover)
+    params = {
+        "lo": lo,
+        "hi": hi,
+        "p": precision,
+        "south": bbox.south,
+        "north": bbox.north,
+        "west": bbox.west,
+        "east": bbox.east,
+        "limit": limit + 1,
+    }
+
+    result = ViewportResult(zoom=zoom, precision=precision)
+    with repo._conn() as conn, conn.cursor() as cur:
+        if raw:
+            cur.execute(_POINTS_SQL.format(lon_filter=_lon_filter("s", bbox)), params)
+            result.points = [Point(*row) for row in cur.fetchall()]
+            result.truncated = len(result.points) > limit
+            del result.points[limit:]
+        else:
+            cur.execute(_CLUSTERS_SQL.format(lon_filter=_lon_filter("c", bbox)), params)
+            result.clusters = [Cluster(*row) for row in cur.fetchall()]
+            result.truncated = len(result.clusters) > limit
+            del result.clusters[limit:]
+    return result
+
+
+def cluster_counts(result: ViewportResult) -> Dict[str, int]:
+    return {c.geohash: c.count for c in result.clusters}
@@ -0,0 +1,156 @@
+# etl/jobs/drain_staging.py
+"""
+Replay the local staging log into the database.
+
+- Reads pending batches from etl.staging.StagingLog (append order)
+- Merges them into bulk upserts per batch kind
+- Marks batches applied only after the upsert committed
+- Compacts applied batches at the end
+
+Safe to run repeatedly (and concurrently with scraping): upserts are
+idempotent, so a crash between upsert and mark_applied just replays.
+
+Run with:
+    python -m etl.jobs.drain_staging
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from etl.staging import BatchKind, StagedBatch, StagingLog
+
+if TYPE_CHECKING:
+  from etl.changefeed import ChangeFeed
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on rows per bulk upsert (and so per transaction) when
+# merging staged batches; a larger merged group is split.
+DEFAULT_BULK_ROWS = 5000
+
+
+def _dedupe_key(kind: BatchKind, row: Dict[str, Any]) -> Tuple[Any, ...]:
+  if kind == "state_license":
+    return (row.get("state_code"), row.get("license_number"))
+  return (row.get("issuer"), row.get("license_number"))
+
+
+def _merge(kind: BatchKind, batches: List[StagedBatch]) -> List[Dict[str, Any]]:
+  # Later batches win, matching what sequential upserts would have done.
+  merged: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+  for b in batches:
+    for row in b.rows:
+      merged[_dedupe_key(kind, row)] = row
+  return list(merged.values())
+
+
+def _apply(kind: BatchKind, rows: List[Dict[str, Any]], pg_repo, entity_repo, changefeed) -> None:
+  if kind == "state_license":
+    from etl.db_client import LicenseRecord
+
+    # PgRepo feeds its own changefeed (if configured) in the same transaction.
+    pg_repo.upsert_state_licenses(LicenseRecord(**r) for r in rows)
+  elif kind == "license_entity":
+    from etl.models import LicenseEntity
+
+    entity_repo.upsert_licenses([LicenseEntity(**r) for r in rows])
+    if changefeed is not None:
+      changefeed.record_upserts("license_entity", rows)
+  else:
+    raise ValueError(f"Unknown staged batch kind: {kind}")
+
+
+def drain_staging(
+  staging: StagingLog,
+  *,
+  pg_repo=None,
+  entity_repo=None,
+  changefeed: Optional["ChangeFeed"] = None,
+  bulk_rows: int = DEFAULT_BULK_ROWS,
+  compact: bool = True,
+) -> int:
+  """
+  Replay every pending batch; returns the number of rows applied.
+
+  `pg_repo` handles "state_license" batches, `entity_repo` handles
+  "license_entity" batches. Batches whose repo is None are left pending.
+  `changefeed` receives the LicenseEntity upserts for search publishing.
+  On a DB error the current group stays pending and the error propagates.
+  """
+  applied_rows = 0
+
+  for kind, repo in (("state_license", pg_repo), ("license_entity", entity_repo)):
+    if repo is None:
+      continue
+
+    group: List[StagedBatch] = []
+    group_rows = 0
+
+    def flush() -> None:
+      nonlocal group, group_rows, applied_rows
+      if not group:
+        return
+      rows = _merge(kind, group)
+      # A single staged batch can already exceed bulk_rows. If a later slice
+      # fails the whole group stays pending; replaying the applied slices is
+      # harmless since upserts are idempotent.
+      for start in range(0, len(rows), bulk_rows):
+        _apply(kind, rows[start : start + bulk_rows], pg_repo, entity_repo, changefeed)
+      staging.mark_applied(b.id for b in group)
+      applied_rows += len(rows)
+      logger.info("Drained %d staged %s batches (%d rows)", len(group), kind, len(rows))
+      group, group_rows = [], 0
+
+    for batch in staging.pending(kind=kind):
+      group.append(batch)
+      group_rows += len(batch.rows)
+      if group_rows >= bulk_rows:
+        flush()
+    flush()
+
+  if compact:
+    staging.compact()
+  return applied_rows
+
+
+def try_drain_staging(staging: StagingLog, **kwargs) -> Optional[int]:
+  """
+  Like drain_staging(), but a DB outage is logged instead of raised.
+
+  Used at the end of scrape jobs: the batches stay in the staging log
+  and the next drain (or next run) applies them.
+  """
+  try:
+    return drain_staging(staging, **kwargs)
+  except Exception as e:
+    logger.warning(
+      "Drain of %s failed; %d batches left pending for replay: %s",
+      staging.path,
+      staging.pending_count(),
+      e,
+    )
+    return None
+
+
+def main() -> None:
+  from etl.changefeed import ChangeFeed
+  from etl.db_client import PgRepo, SupabaseRepository
+
+  logging.basicConfig(level=logging.INFO)
+  # license_entity batches (region ETL) need Supabase; without it they
+  # stay pending for the scheduler or a later drain.
+  entity_repo = SupabaseRepository() if os.getenv("SUPABASE_URL") else None
+  with StagingLog() as staging, ChangeFeed() as changefeed:
+    drain_staging(
+      staging,
+      pg_repo=PgRepo(changefeed=changefeed),
+      entity_repo=entity_repo,
+      changefeed=changefeed,
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,115 @@
+# etl/jobs/publish_search.py
+"""
+Publish license changes to the Algolia search index.
+
+- Reads unpublished entries from the ETL change feed (etl.changefeed)
+- Collapses them to the latest change per objectID
+- Sends them as large batched `/batch` requests (updateObject / deleteObject)
+- Marks entries published only after Algolia accepted the batch
+
+Only churn is sent, so a nightly re-scrape that changes 50 licenses costs
+50 index operations instead of a full re-export.
+
+Uses:
+  - ALGOLIA_APP_ID, ALGOLIA_ADMIN_KEY (same credentials as lib/algolia.ts)
+  - ALGOLIA_INDEX_LICENSES (default: cartfax_licenses); ETL-only, since
+    lib/algolia.ts only writes the dispensaries index
+  - DATABASE_URL (the change feed tables)
+
+Run with:
+    python -m etl.jobs.publish_search
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from etl.changefeed import Change, ChangeFeed
+
+logger = logging.getLogger(__name__)
+
+# Algolia accepts up to ~10MB per batch; license docs are small.
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _collapse(changes: List[Change]) -> List[Change]:
+  latest: Dict[str, Change] = {}
+  for c in changes:
+    latest[c.key] = c
+  return list(latest.values())
+
+
+def _to_action(change: Change) -> Dict[str, Any]:
+  if change.op == "delete":
+    return {"action": "deleteObject", "body": {"objectID": change.key}}
+  return {"action": "updateObject", "body": change.document}
+
+
+class AlgoliaBatchClient:
+  """
+  Minimal REST client for Algolia's batch endpoint (no SDK needed).
+  """
+
+  def __init__(
+    self,
+    app_id: Optional[str] = None,
+    api_key: Optional[str] = None,
+    index_name: Optional[str] = None,
+  ) -> None:
+    self.app_id = app_id or os.getenv("ALGOLIA_APP_ID", "")
+    self.api_key = api_key or os.getenv("ALGOLIA_ADMIN_KEY", "")
+    self.index_name = index_name or os.getenv("ALGOLIA_INDEX_LICENSES", "cartfax_licenses")
+    if not (self.app_id and self.api_key):
+      raise RuntimeError("ALGOLIA_APP_ID and ALGOLIA_ADMIN_KEY are required to publish search changes")
+
+  def batch(self, actions: List[Dict[str, Any]]) -> None:
+    import requests
+
+    resp = requests.post(
+      f"https://{self.app_id}.algolia.net/1/indexes/{self.index_name}/batch",
+      headers={
+        "X-Algolia-Application-Id": self.app_id,
+        "X-Algolia-API-Key": self.api_key,
+      },
+      json={"requests": actions},
+      timeout=60,
+    )
+    resp.raise_for_status()
+
+
+def publish_search_changes(
+  changefeed: ChangeFeed,
+  client: AlgoliaBatchClient,
+  *,
+  batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+  """
+  Push all pending changes; returns the number of index actions sent.
+
+  Stops at the first failed batch; its entries stay pending for the next run.
+  """
+  sent = 0
+  while True:
+    changes = changefeed.pending(limit=batch_size)
+    if not changes:
+      break
+    actions = [_to_action(c) for c in _collapse(changes)]
+    client.batch(actions)
+    changefeed.mark_published(c.seq for c in changes)
+    sent += len(actions)
+    logger.info("Published %d search index actions (%d change entries)", len(actions), len(changes))
+
+  changefeed.compact()
+  return sent
+
+
+def main() -> None:
+  logging.basicConfig(level=logging.INFO)
+  with ChangeFeed() as changefeed:
+    publish_search_changes(changefeed, AlgoliaBatchClient())
+
+
+if __name__ == "__main__":
+  main()
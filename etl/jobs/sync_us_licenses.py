@@ -6,35 +6,43 @@ US license ETL job.
 - For each enabled license source:
     - Fetches JSON/CSV from the endpoint
     - Maps fields into LicenseRecord
-    - Upserts into Postgres via PgRepo
+    - Appends the batch to the local staging log (etl.staging)
+- Drains the staging log into Postgres via PgRepo once all sources are
+  fetched; if Postgres is down the batches are replayed next run.
 """
 
 from __future__ import annotations
 
+import argparse
 import csv
 import io
 import json
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-import requests
-import yaml
-
-from etl.db_client_pg import LicenseRecord, PgRepo
+from etl.changefeed import ChangeFeed
+from etl.db_client import LicenseRecord, PgRepo
+from etl.jobs.drain_staging import try_drain_staging
+from etl.reconcile import SeenKeys, reconcile_seen
+from etl.staging import StagingLog
+from etl.workers import etl_worker_count, run_us_sources_parallel
 
 logger = logging.getLogger(__name__)
 
 
 def _load_sources(config_path: str) -> List[Dict[str, Any]]:
+  import yaml
+
   with open(config_path, "r", encoding="utf-8") as f:
     data = yaml.safe_load(f) or []
   return [s for s in data if s.get("enabled") and s.get("kind") == "license"]
 
 
-def _fetch_data(source: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _fetch_raw(source: Dict[str, Any]) -> str:
+  import requests
+
   endpoint = source["endpoint"]
-  source_type = source.get("source_type", "open_data_api")
 
   # NOTE: We only support simple HTTP GET to open-data endpoints here.
   # Do NOT use this to hit sites that disallow scraping in robots.txt
@@ -45,22 +53,37 @@ def _fetch_data(source: Dict[str, Any]) -> List[Dict[str, Any]]:
 
   resp = requests.get(endpoint, headers=headers, timeout=30)
   resp.raise_for_status()
+  return resp.text
+
+
+def _parse_payload(source: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+  source_type = source.get("source_type", "open_data_api")
 
   if source_type in ("open_data_api", "json"):
-    payload = resp.json()
+    payload = json.loads(text)
     if isinstance(payload, dict):
       # Some APIs nest under e.g. 'results'
       payload = payload.get("results", [])
     return payload
 
   if source_type == "csv":
-    text = resp.text
     reader = csv.DictReader(io.StringIO(text))
     return list(reader)
 
   raise ValueError(f"Unsupported source_type: {source_type}")
 
 
+def _fetch_data(source: Dict[str, Any]) -> List[Dict[str, Any]]:
+  return _parse_payload(source, _fetch_raw(source))
+
+
+def _coord(value: Any) -> Optional[float]:
+  try:
+    return float(value) if value not in (None, "") else None
+  except (TypeError, ValueError):
+    return None
+
+
 def _map_row_to_license(source: Dict[str, Any], row: Dict[str, Any]) -> LicenseRecord:
   fm = source["field_mapping"]
   def get(field: str, default=None):
@@ -76,6 +99,8 @@ def _map_row_to_license(source: Dict[str, Any], row: Dict[str, Any]) -> LicenseR
     country_code="US",
     region_code=source["jurisdiction"].split("-")[-1],
     city=(get("city") or "") or None,
+    latitude=_coord(get("latitude")),
+    longitude=_coord(get("longitude")),
     issued_at=get("issued_at"),
     expires_at=get("expires_at"),
     source_url=source.get("endpoint"),
@@ -84,16 +109,71 @@ def _map_row_to_license(source: Dict[str, Any], row: Dict[str, Any]) -> LicenseR
   )
 
 
-def run_us_license_etl(config_path: str = "etl/sources_us.yml") -> None:
-  repo = PgRepo()
+def run_us_source(src: Dict[str, Any], staging: StagingLog, seen: Optional[SeenKeys] = None) -> int:
+  """
+  Fetch, map and stage a single source; returns the number of rows staged.
+
+  Pass `seen` to collect the fetched keys for reconcile_seen().
+  """
+  logger.info("Running license ETL for source %s", src["id"])
+  rows = _fetch_data(src)
+  records = [_map_row_to_license(src, r) for r in rows]
+  staging.append("state_license", src["id"], records)
+  if seen is not None:
+    seen.add(src, records)
+  logger.info("Staged %s (%d rows)", src["id"], len(records))
+  return len(records)
+
+
+def run_us_license_etl(
+  config_path: str = "etl/sources_us.yml",
+  *,
+  repo: Optional[PgRepo] = None,
+  staging: Optional[StagingLog] = None,
+  workers: Optional[int] = None,
+  reconcile: bool = True,
+) -> None:
+  repo = repo or PgRepo(changefeed=ChangeFeed())
+  staging = staging or StagingLog()
+  workers = workers or etl_worker_count()
+  seen = SeenKeys()
   sources = _load_sources(config_path)
   if not sources:
     logger.info("No enabled US license sources; nothing to do.")
-    return
-
-  for src in sources:
-    logger.info("Running license ETL for source %s", src["id"])
-    rows = _fetch_data(src)
-    records = [_map_row_to_license(src, r) for r in rows]
-    repo.upsert_state_licenses(records)
-    logger.info("Completed %s (%d rows)", src["id"], len(records))
+  elif workers > 1:
+    run_us_sources_parallel(sources, staging, workers=workers, seen=seen)
+  else:
+    for src in sources:
+      run_us_source(src, staging, seen)
+
+  # Also picks up batches left pending by an earlier failed drain.
+  drained = try_drain_staging(staging, pg_repo=repo)
+
+  # Only reconcile against a DB that already holds this run's rows.
+  if reconcile and drained is not None:
+    reconcile_seen(repo, seen, changefeed=repo.changefeed)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Sync US state license sources.")
+  parser.add_argument("--config", default="etl/sources_us.yml")
+  parser.add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="Worker processes for parsing/mapping (default: $ETL_WORKERS or 1).",
+  )
+  parser.add_argument(
+    "--no-reconcile",
+    dest="reconcile",
+    action="store_false",
+    help="Skip marking licences that dropped out of their feed.",
+  )
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  run_us_license_etl(args.config, workers=args.workers, reconcile=args.reconcile)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,64 @@
+# etl/mappers.py
+"""
+Pure row -> model mappers for structured region feeds.
+
+Kept free of scraper / DB imports so etl.workers can run them in worker
+processes: importing this module costs only the stdlib (pydantic is
+loaded on first call).
+"""
+
+from __future__ import annotations
+
+import csv
+from io import StringIO
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from .models import LicenseEntity
+
+
+def map_wa_rows(csv_text: str) -> Tuple[List["LicenseEntity"], List[Tuple[Dict[str, str], str]]]:
+    """
+    Validate WA LCB CSV rows into LicenseEntity objects.
+
+    Pure CPU work (CSV parsing + Pydantic), so etl.workers can fan it out
+    across processes. Returns (licenses, failed) where `failed` holds
+    (row, error) pairs for the LLM fallback.
+    """
+    from .models import LicenseEntity
+
+    reader = csv.DictReader(StringIO(csv_text))
+
+    licenses: List[LicenseEntity] = []
+    failed: List[Tuple[Dict[str, str], str]] = []
+
+    for row in reader:
+        license_number = row.get("LicenseNumber") or row.get("license_number")
+        if not license_number:
+            continue
+
+        try:
+            lic = LicenseEntity(
+                license_number=license_number,
+                issuer="WA-LCB",
+                visibility="public",
+                legal_name=row.get("BusinessName") or row.get("name"),
+                dba_name=row.get("DBAName") or row.get("dba_name"),
+                license_type=row.get("LicenseType") or row.get("license_type"),
+                status=row.get("LicenseStatus") or row.get("status"),
+                address_line1=row.get("Address1") or row.get("StreetAddress"),
+                address_line2=row.get("Address2"),
+                city=row.get("City"),
+                region=row.get("State") or "WA",
+                postal_code=row.get("ZipCode"),
+                country="US",
+                region_config={
+                    "county": row.get("County"),
+                    "premise_type": row.get("PremiseType"),
+                },
+            )
+            licenses.append(lic)
+        except Exception as e:
+            failed.append((row, str(e)))
+
+    return licenses, failed
@@ -9,10 +9,10 @@ into Supabase/Postgres upserts.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
@@ -62,6 +62,7 @@ class LicenseEntity(BaseModel):
         description="Region-specific fields from OpenTHC-like schemas.",
     )
 
+    transparency_score: Decimal = Field(
         default=Decimal("0"),
         description="Aggregate metric; updated later by triggers.",
     )
@@ -92,10 +93,16 @@ class ParsedLicenseBatch:
 
     `licenses` is the validated list.
     `raw_json` is the JSON we got from the LLM (for debugging/self-healing).
+    `prompt_tokens` / `completion_tokens` are the LLM usage for the batch.
+    `failed_chunks` holds (markdown, error) for chunks of a page that
+    could not be parsed when the page was split (see parse_markdown_page).
     """
 
     licenses: List[LicenseEntity]
     raw_json: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    failed_chunks: List[Tuple[str, "LLMParseError"]] = field(default_factory=list)
 
 
 class LLMParseError(Exception):
@@ -4,6 +4,12 @@ LLM-based "perception agent" that turns Markdown into structured LicenseEntity o
 
 - No regex; we rely on an LLM with a strict JSON contract.
 - Pydantic validation catches schema drift and malformed fields.
+- parse_markdown_page() prunes page chrome and splits big pages into
+  token-budgeted chunks (etl.chunking) that are parsed concurrently.
+
+Tuning via env:
+  - LLM_CHUNK_TOKENS      (default 3000; markdown tokens per prompt)
+  - LLM_CHUNK_CONCURRENCY (default 4; parallel LLM calls per page)
 """
 
 from __future__ import annotations
@@ -11,16 +17,22 @@ from __future__ import annotations
 import json
 import logging
 import os
-from typing import List
-
-from openai import OpenAI  # type: ignore
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
+from .chunking import chunk_markdown, estimate_tokens, prune_markdown
 from .models import LLMParseError, LicenseEntity, ParsedLicenseBatch, LicenseIssuer
 
+if TYPE_CHECKING:
+    from openai import OpenAI  # type: ignore
+
 logger = logging.getLogger(__name__)
 
 
-def _get_openai_client() -> OpenAI:
+def _get_openai_client() -> "OpenAI":
+    # Imported here so `import etl.parser` stays cheap for jobs that never call the LLM.
+    from openai import OpenAI  # type: ignore
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY must be set for LLM parsing.")
@@ -87,6 +99,9 @@ def parse_with_llm(
 
     raw = completion.choices[0].message.content or ""
     raw = raw.strip()
+    usage = getattr(completion, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
 
     try:
         data = json.loads(raw)
@@ -117,4 +132,100 @@ def parse_with_llm(
                 details=str(e),
             ) from e
 
-    return ParsedLicenseBatch(licenses=licenses, raw_json=raw)
+    return ParsedLicenseBatch(
+        licenses=licenses,
+        raw_json=raw,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+    )
+
+
+def _merge_license(into: LicenseEntity, other: LicenseEntity) -> None:
+    # Same license seen in two chunks (e.g. a record straddling a boundary
+    # after a hard split): keep the first, fill its gaps from the second.
+    for name, value in other.dict(exclude_none=True).items():
+        if getattr(into, name, None) in (None, "", {}):
+            setattr(into, name, value)
+
+
+def parse_markdown_page(
+    markdown_content: str,
+    *,
+    issuer: LicenseIssuer,
+    region_hint: str,
+    max_chunk_tokens: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> ParsedLicenseBatch:
+    """
+    Prune, chunk and parse one rendered page; merge + dedupe the results.
+
+    Chunks that fail are returned in `failed_chunks` instead of failing
+    the whole page; LLMParseError is raised only if every chunk failed.
+    """
+    max_chunk_tokens = max_chunk_tokens or int(os.getenv("LLM_CHUNK_TOKENS", "3000"))
+    concurrency = concurrency or int(os.getenv("LLM_CHUNK_CONCURRENCY", "4"))
+
+    raw_tokens = estimate_tokens(markdown_content)
+    pruned = prune_markdown(markdown_content)
+    chunks = chunk_markdown(pruned, max_tokens=max_chunk_tokens) if pruned else []
+    if not chunks:
+        logger.info("Page for issuer=%s had no content after pruning (%d tokens raw)", issuer, raw_tokens)
+        return ParsedLicenseBatch(licenses=[], raw_json="[]")
+
+    def parse_chunk(chunk: str) -> Tuple[str, object]:
+        try:
+            return chunk, parse_with_llm(chunk, issuer=issuer, region_hint=region_hint)
+        except LLMParseError as err:
+            return chunk, err
+
+    if len(chunks) == 1:
+        results = [parse_chunk(chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+            results = list(pool.map(parse_chunk, chunks))
+
+    merged: Dict[Tuple[str, str], LicenseEntity] = {}
+    raw_parts: List[str] = []
+    failed: List[Tuple[str, LLMParseError]] = []
+    prompt_tokens = completion_tokens = 0
+
+    for chunk, result in results:
+        if isinstance(result, LLMParseError):
+            failed.append((chunk, result))
+            continue
+        assert isinstance(result, ParsedLicenseBatch)
+        raw_parts.append(result.raw_json)
+        prompt_tokens += result.prompt_tokens
+        completion_tokens += result.completion_tokens
+        for lic in result.licenses:
+            key = (lic.issuer, lic.license_number.strip().upper())
+            if key in merged:
+                _merge_license(merged[key], lic)
+            else:
+                merged[key] = lic
+
+    if failed and len(failed) == len(chunks):
+        raise failed[0][1]
+
+    licenses = list(merged.values())
+    logger.info(
+        "Parsed page issuer=%s: %d chunks (%d failed), markdown tokens %d -> %d after pruning, "
+        "LLM tokens in=%d out=%d, %d licenses (%.0f tokens/license)",
+        issuer,
+        len(chunks),
+        len(failed),
+        raw_tokens,
+        estimate_tokens(pruned),
+        prompt_tokens,
+        completion_tokens,
+        len(licenses),
+        (prompt_tokens + completion_tokens) / len(licenses) if licenses else 0.0,
+    )
+
+    return ParsedLicenseBatch(
+        licenses=licenses,
+        raw_json="\n".join(raw_parts),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        failed_chunks=failed,
+    )
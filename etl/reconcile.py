@@ -0,0 +1,286 @@
+# etl/reconcile.py
+"""
+Disappearance reconciliation for StateLicense.
+
+Upserts never notice a licence that silently drops out of a state's
+feed, so it would stay "active" forever. After a run's staged rows have
+been drained, each source_system that was fetched gets reconciled:
+
+  1. COPY the run's (stateCode, licenseNumber) keys into a temp table
+  2. LEFT JOIN the source's active rows against it to count what's missing
+  3. check the safety thresholds; abort (roll back) if the feed shrank
+     suspiciously, e.g. a truncated download or an API returning page 1 only
+  4. mark every missing row in one anti-join UPDATE:
+     status = MISSING_STATUS, "missingSince" = now
+
+All of this runs in Postgres, so no rows are pulled into Python.
+A licence that reappears is restored by the next upsert (status from
+the feed, "missingSince" cleared).
+
+Thresholds (env; per source override via `reconcile:` in sources_us.yml):
+  - ETL_RECONCILE_MAX_MISSING_RATIO  (default 0.05 = 5% of active rows)
+  - ETL_RECONCILE_MAX_MISSING_ROWS   (default: no absolute cap)
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .changefeed import ChangeFeed
+    from .db_client import LicenseRecord, PgRepo
+
+logger = logging.getLogger(__name__)
+
+MISSING_STATUS = "missing_from_source"
+
+LicenseKey = Tuple[str, str]  # (stateCode, licenseNumber)
+
+
+class ReconcileAborted(RuntimeError):
+    """
+    A safety threshold tripped; nothing was marked for this source.
+    """
+
+    def __init__(self, result: "ReconcileResult") -> None:
+        super().__init__(f"{result.source_system}: {result.aborted}")
+        self.result = result
+
+
+@dataclass
+class ReconcileThresholds:
+    max_missing_ratio: float = 0.05
+    max_missing_rows: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, overrides: Optional[Dict[str, Any]] = None) -> "ReconcileThresholds":
+        overrides = overrides or {}
+        max_rows = overrides.get("max_missing_rows", os.getenv("ETL_RECONCILE_MAX_MISSING_ROWS"))
+        return cls(
+            max_missing_ratio=float(
+                overrides.get("max_missing_ratio", os.getenv("ETL_RECONCILE_MAX_MISSING_RATIO", "0.05"))
+            ),
+            max_missing_rows=int(max_rows) if max_rows not in (None, "") else None,
+        )
+
+    def check(self, *, seen: int, active: int, missing: int) -> Optional[str]:
+        """
+        Reason to abort, or None if marking `missing` rows is safe.
+        """
+        if missing == 0:
+            return None
+        if seen == 0:
+            return f"feed returned no rows but {active} licences are active"
+        ratio = missing / active if active else 0.0
+        if ratio > self.max_missing_ratio:
+            return (
+                f"{missing} of {active} active licences missing ({ratio:.1%}) "
+                f"exceeds max_missing_ratio {self.max_missing_ratio:.1%}"
+            )
+        if self.max_missing_rows is not None and missing > self.max_missing_rows:
+            return f"{missing} missing licences exceeds max_missing_rows {self.max_missing_rows}"
+        return None
+
+
+@dataclass
+class ReconcileResult:
+    source_system: str
+    seen: int
+    active: int = 0
+    missing: int = 0
+    marked: int = 0
+    aborted: Optional[str] = None
+
+
+@dataclass
+class SeenKeys:
+    """
+    Keys fetched this run, grouped by the source_system they were written with.
+
+    A source registers its source_system even when it returned no rows,
+    so an empty feed is reported as an abort instead of being ignored.
+    """
+
+    keys: Dict[str, Set[LicenseKey]] = field(default_factory=dict)
+    thresholds: Dict[str, ReconcileThresholds] = field(default_factory=dict)
+    warned: Set[str] = field(default_factory=set)
+
+    def add(self, source: Dict[str, Any], records: Iterable["LicenseRecord"]) -> None:
+        self.add_keys(
+            source,
+            ((r.source_system, r.state_code, r.license_number) for r in records if r.source_system),
+        )
+
+    def add_keys(self, source: Dict[str, Any], keys: Iterable[Tuple[str, str, str]]) -> None:
+        """
+        Like add(), from (source_system, stateCode, licenseNumber) triples.
+        """
+        config = source.get("reconcile", {})
+        if config is False:
+            return
+        overrides = config if isinstance(config, dict) else {}
+
+        if not source.get("source_system") and source.get("id") not in self.warned:
+            # Its rows are written without a sourceSystem, so nothing would
+            # ever be reconciled for it.
+            self.warned.add(source.get("id"))
+            logger.warning(
+                "Source %s has reconcile enabled but no top-level source_system; "
+                "its licences will never be marked missing",
+                source.get("id"),
+            )
+        systems = {source["source_system"]} if source.get("source_system") else set()
+        for system in systems:
+            self.keys.setdefault(system, set())
+        for system, state_code, license_number in keys:
+            self.keys.setdefault(system, set()).add((state_code, license_number))
+            systems.add(system)
+        for system in systems:
+            self.thresholds.setdefault(system, ReconcileThresholds.from_env(overrides))
+
+    def clear(self) -> None:
+        self.keys.clear()
+        self.thresholds.clear()
+        self.warned.clear()
+
+
+_SEEN_TABLE_SQL = """
+CREATE TEMP TABLE etl_seen_license (
+  "stateCode"     TEXT NOT NULL,
+  "licenseNumber" TEXT NOT NULL,
+  PRIMARY KEY ("stateCode", "licenseNumber")
+) ON COMMIT DROP
+"""
+
+_COUNT_SQL = """
+SELECT count(*), count(*) FILTER (WHERE k."stateCode" IS NULL)
+FROM "StateLicense" s
+LEFT JOIN etl_seen_license k
+  ON k."stateCode" = s."stateCode" AND k."licenseNumber" = s."licenseNumber"
+WHERE s."sourceSystem" = %(source_system)s AND s."missingSince" IS NULL
+"""
+
+_MARK_SQL = """
+UPDATE "StateLicense" s
+SET "status" = %(status)s,
+    "missingSince" = (now() AT TIME ZONE 'UTC'),
+    "updatedAt" = (now() AT TIME ZONE 'UTC')
+WHERE s."sourceSystem" = %(source_system)s
+  AND s."missingSince" IS NULL
+  AND NOT EXISTS (
+    SELECT 1 FROM etl_seen_license k
+    WHERE k."stateCode" = s."stateCode" AND k."licenseNumber" = s."licenseNumber"
+  )
+RETURNING s."stateCode", s."licenseNumber", s."licenseType", s."status", s."entityName",
+          s."countryCode", s."city", s."latitude", s."longitude", s."sourceSystem"
+"""
+
+_RETURNED_FIELDS = (
+    "state_code",
+    "license_number",
+    "license_type",
+    "status",
+    "entity_name",
+    "country_code",
+    "city",
+    "latitude",
+    "longitude",
+    "source_system",
+)
+
+
+def reconcile_source(
+    repo: "PgRepo",
+    source_system: str,
+    keys: Iterable[LicenseKey],
+    *,
+    thresholds: Optional[ReconcileThresholds] = None,
+    changefeed: Optional["ChangeFeed"] = None,
+    dry_run: bool = False,
+) -> ReconcileResult:
+    """
+    Mark active `source_system` licences whose key is not in `keys`.
+
+    Raises ReconcileAborted (and marks nothing) when a threshold trips.
+    With dry_run, only counts. Marked rows go to `changefeed` as updates
+    (in the same transaction) so the search index picks up the new status.
+    """
+    thresholds = thresholds or ReconcileThresholds.from_env()
+    keys = set(keys)
+
+    buf = io.StringIO()
+    # Quote every field: COPY csv reads an unquoted empty field as NULL,
+    # which the NOT NULL key columns would reject.
+    csv.writer(buf, quoting=csv.QUOTE_ALL).writerows(keys)
+    buf.seek(0)
+
+    result = ReconcileResult(source_system=source_system, seen=len(keys))
+    marked: List[Dict[str, Any]] = []
+    with repo._conn() as conn, conn.cursor() as cur:
+        cur.execute(_SEEN_TABLE_SQL)
+        cur.copy_expert('COPY etl_seen_license ("stateCode", "licenseNumber") FROM STDIN WITH (FORMAT csv)', buf)
+        cur.execute("ANALYZE etl_seen_license")
+
+        params = {"source_system": source_system, "status": MISSING_STATUS}
+        cur.execute(_COUNT_SQL, params)
+        result.active, result.missing = cur.fetchone()
+
+        result.aborted = thresholds.check(seen=result.seen, active=result.active, missing=result.missing)
+        if result.aborted:
+            raise ReconcileAborted(result)
+
+        if result.missing and not dry_run:
+            cur.execute(_MARK_SQL, params)
+            marked = [dict(zip(_RETURNED_FIELDS, row)) for row in cur.fetchall()]
+            result.marked = len(marked)
+            if marked and changefeed is not None:
+                changefeed.record_upserts("state_license", marked, cur=cur)
+
+    logger.info(
+        "Reconciled %s: %d seen, %d active, %d missing, %d marked %s",
+        source_system,
+        result.seen,
+        result.active,
+        result.missing,
+        result.marked,
+        MISSING_STATUS,
+    )
+    return result
+
+
+def reconcile_seen(
+    repo: "PgRepo",
+    seen: SeenKeys,
+    *,
+    changefeed: Optional["ChangeFeed"] = None,
+    dry_run: bool = False,
+) -> List[ReconcileResult]:
+    """
+    Reconcile every source_system in `seen`; an abort or error skips only
+    that source.
+    """
+    results: List[ReconcileResult] = []
+    for system, keys in seen.keys.items():
+        try:
+            results.append(
+                reconcile_source(
+                    repo,
+                    system,
+                    keys,
+                    thresholds=seen.thresholds.get(system),
+                    changefeed=changefeed,
+                    dry_run=dry_run,
+                )
+            )
+        except ReconcileAborted as e:
+            logger.warning("Reconciliation aborted for %s; nothing marked: %s", system, e.result.aborted)
+            results.append(e.result)
+        except Exception as e:
+            logger.exception("Reconciliation failed for %s; nothing marked", system)
+            results.append(ReconcileResult(source_system=system, seen=len(keys), aborted=str(e)))
+    return results
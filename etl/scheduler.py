@@ -0,0 +1,324 @@
+# etl/scheduler.py
+"""
+Long-running ETL scheduler.
+
+- Builds one job per enabled US source (etl/sources_us.yml, using each
+  source's `cadence_minutes`) plus the CA / WA / DE region jobs.
+- Keeps one LicenseScraper (browser; only opened when region jobs are
+  enabled) and one PgRepo connection pool warm for the life of the
+  process instead of paying start-up cost per run.
+- Wraps every run in a Postgres advisory-lock lease named after the job,
+  so several scheduler processes can share the load without two of them
+  processing the same source at once. Under the lease, the job's last
+  finish time (the "EtlJobRun" table) is checked, so a source runs once
+  per cadence across the whole fleet, not once per worker.
+- Drains the staging log after each run, feeding the search change feed,
+  then reconciles US sources (etl.reconcile) so licences that left a feed
+  are marked missing.
+- If ALGOLIA_APP_ID is set, publishes search index deltas every
+  ETL_SEARCH_PUBLISH_MINUTES (default 5).
+
+Region cadences (minutes) come from env:
+  - ETL_CA_CADENCE_MINUTES (default 360)
+  - ETL_WA_CADENCE_MINUTES (default 1440)
+  - ETL_DE_CADENCE_MINUTES (default 10080)
+Regions are toggled with the same ETL_ENABLE_* flags as etl_pipeline;
+Supabase credentials are only required when at least one is enabled.
+
+Run with:
+    python -m etl.scheduler
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import signal
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .changefeed import ChangeFeed
+from .db_client import PgRepo, SupabaseRepository
+from .etl_pipeline import REGION_JOBS, enabled_regions
+from .jobs.drain_staging import try_drain_staging
+from .jobs.sync_us_licenses import _load_sources, run_us_source
+from .reconcile import SeenKeys, reconcile_seen
+from .scraper_agent import LicenseScraper
+from .staging import StagingLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_CADENCE_MINUTES = 1440
+
+REGION_CADENCE_DEFAULTS: Dict[str, int] = {
+    "CA": 360,
+    "WA": 1440,
+    "DE": 10080,
+}
+
+
+@dataclass
+class ScheduledJob:
+    """
+    One schedulable unit of ETL work.
+
+    `name` doubles as the advisory-lock lease key, so it must be stable
+    across worker processes.
+    """
+
+    name: str
+    cadence_seconds: float
+    run: Callable[[], Awaitable[None]]
+    # Runs (in a thread) after a successful run and drain.
+    after_drain: Optional[Callable[[PgRepo], None]] = None
+    next_run: float = field(default=0.0)
+    running: bool = False
+
+    def due(self, now: float) -> bool:
+        return not self.running and now >= self.next_run
+
+
+@asynccontextmanager
+async def _lease(pg_repo: PgRepo, name: str) -> AsyncIterator[bool]:
+    """
+    PgRepo.lease() with the blocking lock calls moved off the event loop.
+    """
+    lease = pg_repo.lease(name)
+    acquired = await asyncio.to_thread(lease.__enter__)
+    try:
+        yield acquired
+    finally:
+        await asyncio.to_thread(lease.__exit__, None, None, None)
+
+
+class EtlScheduler:
+    """
+    Single-process scheduler loop; run one per ETL worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        config_path: str = "etl/sources_us.yml",
+        tick_seconds: float = 15.0,
+    ) -> None:
+        self.config_path = config_path
+        self.tick_seconds = tick_seconds
+        self._stop = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _build_jobs(
+        self,
+        *,
+        entity_repo: Optional[SupabaseRepository],
+        scraper: Optional[LicenseScraper],
+        staging: StagingLog,
+        changefeed: ChangeFeed,
+    ) -> List[ScheduledJob]:
+        jobs: List[ScheduledJob] = []
+        sources = _load_sources(self.config_path)
+
+        # Each source is reconciled right after its own run, against every
+        # active row of its source_system; two sources sharing one would
+        # mark each other's licences missing.
+        by_system: Dict[str, List[str]] = {}
+        for src in sources:
+            if src.get("source_system") and src.get("reconcile", {}) is not False:
+                by_system.setdefault(src["source_system"], []).append(src["id"])
+        shared = {system: ids for system, ids in by_system.items() if len(ids) > 1}
+        for system, ids in shared.items():
+            logger.warning(
+                "Sources %s share source_system %s; reconcile disabled for them",
+                ", ".join(ids),
+                system,
+            )
+
+        for src in sources:
+            if src.get("source_system") in shared:
+                src = {**src, "reconcile": False}
+            cadence = float(src.get("cadence_minutes", DEFAULT_SOURCE_CADENCE_MINUTES)) * 60
+
+            seen = SeenKeys()
+
+            async def run_source(src=src, seen=seen) -> None:
+                seen.clear()
+                # run_us_source uses blocking `requests`; keep the loop free.
+                await asyncio.to_thread(run_us_source, src, staging, seen)
+
+            def reconcile(pg_repo: PgRepo, seen=seen) -> None:
+                reconcile_seen(pg_repo, seen, changefeed=changefeed)
+
+            jobs.append(
+                ScheduledJob(
+                    name=f"etl:us:{src['id']}",
+                    cadence_seconds=cadence,
+                    run=run_source,
+                    after_drain=reconcile if src.get("reconcile", {}) is not False else None,
+                )
+            )
+
+        for region in enabled_regions() if entity_repo is not None else []:
+            job_fn = REGION_JOBS[region]
+            minutes = float(
+                os.getenv(f"ETL_{region}_CADENCE_MINUTES", REGION_CADENCE_DEFAULTS[region])
+            )
+
+            async def run_region(job_fn=job_fn) -> None:
+                await job_fn(entity_repo, scraper, staging)
+
+            jobs.append(ScheduledJob(name=f"etl:region:{region}", cadence_seconds=minutes * 60, run=run_region))
+
+        if os.getenv("ALGOLIA_APP_ID"):
+            from .jobs.publish_search import AlgoliaBatchClient, publish_search_changes
+
+            client = AlgoliaBatchClient()
+            minutes = float(os.getenv("ETL_SEARCH_PUBLISH_MINUTES", "5"))
+
+            async def run_publish() -> None:
+                await asyncio.to_thread(publish_search_changes, changefeed, client)
+
+            jobs.append(ScheduledJob(name="etl:publish-search", cadence_seconds=minutes * 60, run=run_publish))
+
+        # Stagger first runs so a fleet of fresh workers doesn't stampede.
+        now = time.monotonic()
+        for job in jobs:
+            job.next_run = now + random.uniform(0, min(job.cadence_seconds, self.tick_seconds * 4))
+        return jobs
+
+    async def _run_job(
+        self,
+        job: ScheduledJob,
+        *,
+        pg_repo: PgRepo,
+        entity_repo: Optional[SupabaseRepository],
+        staging: StagingLog,
+        changefeed: ChangeFeed,
+    ) -> None:
+        job.running = True
+        wait = job.cadence_seconds
+        try:
+            async with _lease(pg_repo, job.name) as acquired:
+                if not acquired:
+                    logger.info("Skipping %s; lease held by another worker", job.name)
+                    return
+                # The lease only stops overlapping runs; another worker may
+                # have finished this job moments ago.
+                since = await asyncio.to_thread(pg_repo.seconds_since_job_finished, job.name)
+                if since is not None and since < job.cadence_seconds:
+                    wait = job.cadence_seconds - since
+                    logger.info("Skipping %s; another worker finished it %.0fs ago", job.name, since)
+                    return
+                started = time.monotonic()
+                ok = False
+                try:
+                    await job.run()
+                    ok = True
+                except Exception:
+                    logger.exception("Scheduled job %s failed", job.name)
+                finally:
+                    drained = await asyncio.to_thread(
+                        try_drain_staging,
+                        staging,
+                        pg_repo=pg_repo,
+                        entity_repo=entity_repo,
+                        changefeed=changefeed,
+                    )
+                if ok and drained is not None and job.after_drain is not None:
+                    try:
+                        await asyncio.to_thread(job.after_drain, pg_repo)
+                    except Exception:
+                        logger.exception("Post-drain step for %s failed", job.name)
+                # Recorded even after a failure: like the local wait below, a
+                # failing source is retried next cadence, not by every worker.
+                await asyncio.to_thread(pg_repo.mark_job_finished, job.name)
+                logger.info("Finished %s in %.1fs", job.name, time.monotonic() - started)
+        except Exception:
+            # Lease or run bookkeeping failed (DB down); retry next cadence.
+            logger.exception("Could not lease %s", job.name)
+        finally:
+            # Skipped, failed or done: wait a cadence (or until the run
+            # another worker finished is a cadence old) before trying again.
+            job.next_run = time.monotonic() + wait
+            job.running = False
+
+    async def run_forever(self) -> None:
+        # Region jobs are optional; without any, Supabase isn't needed.
+        entity_repo = SupabaseRepository() if enabled_regions() else None
+        staging = StagingLog()
+        changefeed = ChangeFeed()
+        pg_repo: Optional[PgRepo] = None
+        tasks: List[asyncio.Task] = []
+
+        try:
+            async with AsyncExitStack() as stack:
+                # The browser is only needed by region jobs; a US-only
+                # scheduler runs without crawl4ai / Chromium installed.
+                scraper: Optional[LicenseScraper] = None
+                if entity_repo is not None:
+                    scraper = await stack.enter_async_context(LicenseScraper())
+                jobs = self._build_jobs(
+                    entity_repo=entity_repo,
+                    scraper=scraper,
+                    staging=staging,
+                    changefeed=changefeed,
+                )
+                if not jobs:
+                    logger.info("No ETL jobs enabled; scheduler exiting.")
+                    return
+                # A running job pins one pooled connection for its lease and
+                # uses one more at a time for the drain / reconcile / run
+                # bookkeeping; the extra one is for ad-hoc queries.
+                pg_repo = PgRepo(pool_size=2 * len(jobs) + 1, changefeed=changefeed)
+                logger.info("Scheduler started with %d jobs", len(jobs))
+
+                while not self._stop.is_set():
+                    now = time.monotonic()
+                    for job in jobs:
+                        if job.due(now):
+                            tasks.append(
+                                asyncio.create_task(
+                                    self._run_job(
+                                        job,
+                                        pg_repo=pg_repo,
+                                        entity_repo=entity_repo,
+                                        staging=staging,
+                                        changefeed=changefeed,
+                                    )
+                                )
+                            )
+                    tasks = [t for t in tasks if not t.done()]
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), timeout=self.tick_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if tasks:
+                    logger.info("Waiting for %d running jobs before shutdown", len(tasks))
+                    await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            staging.close()
+            changefeed.close()
+            if pg_repo is not None:
+                pg_repo.close()
+
+
+async def main(config_path: Optional[str] = None) -> None:
+    scheduler = EtlScheduler(config_path=config_path or "etl/sources_us.yml")
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, scheduler.stop)
+        except NotImplementedError:  # Windows
+            pass
+    await scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
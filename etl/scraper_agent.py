@@ -17,15 +17,12 @@ import asyncio
 import logging
 import os
 import random
-from typing import AsyncIterator, List, Optional
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
 
-import httpx  # async HTTP client for CSV / file downloads
-from crawl4ai import AsyncWebCrawler  # type: ignore
-from crawl4ai.async_configs import (  # type: ignore
-    BrowserConfig,
-    CacheMode,
-    CrawlerRunConfig,
-)
+# crawl4ai (Playwright) and httpx are imported where they are used, so
+# jobs that never open a browser or download a CSV don't pay for them.
+if TYPE_CHECKING:
+    from crawl4ai import AsyncWebCrawler  # type: ignore
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +57,8 @@ class LicenseScraper:
         self.min_delay = min_delay
         self.max_delay = max_delay
 
+        from crawl4ai.async_configs import BrowserConfig  # type: ignore
+
         ua = random.choice(self.user_agents)
         self.browser_config = BrowserConfig(
             # JS-enabled, headless Chromium by default.
@@ -69,6 +68,8 @@ class LicenseScraper:
         self._crawler: Optional[AsyncWebCrawler] = None
 
     async def __aenter__(self) -> "LicenseScraper":
+        from crawl4ai import AsyncWebCrawler  # type: ignore
+
         self._crawler = AsyncWebCrawler(config=self.browser_config)
         self._ctx = self._crawler.__aenter__()  # type: ignore[attr-defined]
         await self._ctx
@@ -93,6 +94,8 @@ class LicenseScraper:
         """
         assert self._crawler is not None, "Use LicenseScraper as an async context manager."
 
+        from crawl4ai.async_configs import CacheMode, CrawlerRunConfig  # type: ignore
+
         await asyncio.sleep(random.uniform(self.min_delay, self.max_delay))
 
         run_cfg = CrawlerRunConfig(
@@ -151,6 +154,8 @@ class LicenseScraper:
         )
         logger.info("Downloading WA license CSV from %s", url)
 
+        import httpx  # async HTTP client for CSV / file downloads
+
         async with httpx.AsyncClient(timeout=60.0) as client:
             resp = await client.get(url)
             resp.raise_for_status()
@@ -0,0 +1,254 @@
+# etl/staging.py
+"""
+Write-ahead staging log for parsed ETL batches.
+
+Every parsed batch is appended to a local SQLite file *before* anything
+touches Postgres/Supabase. A separate drain step (see
+`etl.jobs.drain_staging`) replays pending batches into the database and
+marks them applied, so a DB outage at the end of a run no longer throws
+away an expensive crawl + LLM pass.
+
+- Append-only: batches are never rewritten, only marked applied.
+- Idempotent replay: the DB upserts are ON CONFLICT, so replaying a
+  batch twice (e.g. crash between upsert and mark_applied) is safe.
+- Compaction: applied batches are deleted; the file is vacuumed only
+  once the free space left behind passes a threshold.
+
+Configured via:
+  - ETL_STAGING_PATH (default: etl_staging.sqlite3 in the CWD)
+  - ETL_STAGING_VACUUM_MB (default 64; free space that triggers VACUUM)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, fields, is_dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Which upsert path a batch is replayed through:
+#   - "state_license" -> PgRepo.upsert_state_licenses (LicenseRecord)
+#   - "license_entity" -> repo.upsert_licenses (LicenseEntity)
+BatchKind = Literal["state_license", "license_entity"]
+
+DEFAULT_STAGING_PATH = "etl_staging.sqlite3"
+DEFAULT_VACUUM_MB = 64
+# Batches read per query while draining, so a long outage's backlog
+# is streamed instead of loaded all at once.
+PENDING_PAGE_SIZE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS staged_batch (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind        TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    row_count   INTEGER NOT NULL,
+    created_at  TEXT NOT NULL,
+    applied_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS staged_batch_pending
+    ON staged_batch (applied_at, id);
+"""
+
+
+@dataclass
+class StagedBatch:
+    """
+    One pending batch read back from the staging log.
+
+    `rows` are plain dicts; the drainer rebuilds LicenseRecord /
+    LicenseEntity objects from them.
+    """
+
+    id: int
+    kind: BatchKind
+    source: str
+    rows: List[Dict[str, Any]]
+    created_at: str
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls))
+
+
+def _row_to_dict(row: Any) -> Dict[str, Any]:
+    if is_dataclass(row):
+        # Shallow copy: asdict() would deep-copy every raw_data dict only
+        # for json.dumps to read it once.
+        return {name: getattr(row, name) for name in _field_names(type(row))}
+    if hasattr(row, "to_db_dict"):
+        return row.to_db_dict()
+    if isinstance(row, dict):
+        return row
+    raise TypeError(f"Cannot stage object of type {type(row).__name__}")
+
+
+def serialize_rows(rows: Iterable[Any]) -> Tuple[str, int]:
+    """
+    Encode a batch the way append() stores it; returns (payload, row_count).
+
+    Exposed so etl.workers can serialise in the worker processes and hand
+    the parent a ready payload for append_serialized().
+    """
+    items = [_row_to_dict(r) for r in rows]
+    return json.dumps(items, default=str), len(items)
+
+
+class StagingLog:
+    """
+    Local append-only log of parsed batches, backed by SQLite.
+
+    SQLite is in the stdlib, survives process crashes (WAL mode) and is
+    fast enough that appends never become the bottleneck of a scrape.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.getenv("ETL_STAGING_PATH", DEFAULT_STAGING_PATH)
+        parent = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent, exist_ok=True)
+
+        # Shared across threads (the scheduler runs blocking jobs via
+        # asyncio.to_thread); _lock serializes access to the connection.
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "StagingLog":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # -----------------------
+    # Write side
+    # -----------------------
+
+    def append(self, kind: BatchKind, source: str, rows: Iterable[Any]) -> Optional[int]:
+        """
+        Durably append one batch; returns its id (None for an empty batch).
+
+        `rows` may be dataclasses (LicenseRecord), pydantic models
+        (LicenseEntity) or plain dicts.
+        """
+        payload, row_count = serialize_rows(rows)
+        return self.append_serialized(kind, source, payload, row_count)
+
+    def append_serialized(self, kind: BatchKind, source: str, payload: str, row_count: int) -> Optional[int]:
+        """
+        Append a batch already encoded by serialize_rows().
+        """
+        if not row_count:
+            return None
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO staged_batch (kind, source, payload, row_count, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, source, payload, row_count, _now()),
+            )
+        logger.debug("Staged %d %s rows from %s as batch %d", row_count, kind, source, cur.lastrowid)
+        return cur.lastrowid
+
+    # -----------------------
+    # Drain side
+    # -----------------------
+
+    def pending(
+        self,
+        *,
+        kind: Optional[BatchKind] = None,
+        page_size: int = PENDING_PAGE_SIZE,
+    ) -> Iterator[StagedBatch]:
+        """
+        Yield un-applied batches in append order.
+
+        Reads `page_size` batches at a time (keyset on id), so only one
+        page of payloads is in memory however large the backlog is.
+        """
+        sql = (
+            "SELECT id, kind, source, payload, created_at FROM staged_batch "
+            "WHERE applied_at IS NULL AND id > ?"
+        )
+        if kind is not None:
+            sql += " AND kind = ?"
+        sql += " ORDER BY id LIMIT ?"
+
+        last_id = 0
+        while True:
+            params: tuple = (last_id, kind, page_size) if kind is not None else (last_id, page_size)
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+            if not rows:
+                return
+            for id_, kind_, source, payload, created_at in rows:
+                yield StagedBatch(
+                    id=id_,
+                    kind=kind_,
+                    source=source,
+                    rows=json.loads(payload),
+                    created_at=created_at,
+                )
+            last_id = rows[-1][0]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute(
+                "SELECT COUNT(*) FROM staged_batch WHERE applied_at IS NULL"
+            ).fetchone()
+        return count
+
+    def mark_applied(self, batch_ids: Iterable[int]) -> None:
+        ids = list(batch_ids)
+        if not ids:
+            return
+        with self._lock:
+            self._db.executemany(
+                "UPDATE staged_batch SET applied_at = ? WHERE id = ?",
+                [(_now(), i) for i in ids],
+            )
+
+    def compact(self) -> int:
+        """
+        Drop applied batches; returns rows removed.
+
+        SQLite reuses the freed pages for later appends, so the file is
+        only vacuumed (which blocks appends while it runs) once the free
+        space exceeds ETL_STAGING_VACUUM_MB.
+        """
+        with self._lock:
+            cur = self._db.execute("DELETE FROM staged_batch WHERE applied_at IS NOT NULL")
+            removed = cur.rowcount
+            vacuumed = False
+            if removed:
+                (free_pages,) = self._db.execute("PRAGMA freelist_count").fetchone()
+                (page_size,) = self._db.execute("PRAGMA page_size").fetchone()
+                limit_mb = float(os.getenv("ETL_STAGING_VACUUM_MB", DEFAULT_VACUUM_MB))
+                if free_pages * page_size > limit_mb * 1024 * 1024:
+                    self._db.execute("VACUUM")
+                    vacuumed = True
+        if removed:
+            logger.info(
+                "Compacted staging log %s (%d applied batches removed%s)",
+                self.path,
+                removed,
+                ", vacuumed" if vacuumed else "",
+            )
+        return removed
@@ -0,0 +1,49 @@
+from etl.chunking import prune_markdown
+
+PAGE = """\
+[Skip to content](#main)
+[Home](/) | [Licenses](/licenses) | [About](/about)
+We use cookies to improve your experience. [Accept all cookies](#)
+
+# License Search Results
+
+## Cookies Retail Inc
+License Number: C10-0000123
+**Status:** Active
+
+| Business | License | City |
+| --- | --- | --- |
+| [Cookies SF](/l/1) | [C10-0000456](/l/1) | [San Francisco](/c/sf) |
+| [Green Cross](/l/2) | [C10-0000789](/l/2) | [Oakland](/c/oak) |
+
+## Follow Us Dispensary
+Address: 1 Market St, Sacramento
+
+[Privacy Policy](/privacy) | [Terms of Use](/terms)
+© 2026 Department of Cannabis Control. All rights reserved.
+"""
+
+
+def test_prune_keeps_record_lines():
+    pruned = prune_markdown(PAGE)
+
+    for line in (
+        "## Cookies Retail Inc",
+        "License Number: C10-0000123",
+        "**Status:** Active",
+        "| [Cookies SF](/l/1) | [C10-0000456](/l/1) | [San Francisco](/c/sf) |",
+        "| [Green Cross](/l/2) | [C10-0000789](/l/2) | [Oakland](/c/oak) |",
+        "## Follow Us Dispensary",
+        "Address: 1 Market St, Sacramento",
+    ):
+        assert line in pruned.splitlines()
+
+
+def test_prune_drops_leading_and_trailing_chrome():
+    pruned = prune_markdown(PAGE)
+
+    assert "Skip to content" not in pruned
+    assert "[About](/about)" not in pruned
+    assert "We use cookies" not in pruned
+    assert "Privacy Policy" not in pruned
+    assert "All rights reserved" not in pruned
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+from etl.db_client import LICENSE_LOCK_BUCKETS, LicenseRecord, PgRepo
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, sql, args=None):
+        return sql.encode("utf-8")
+
+    def execute(self, sql, args=None):
+        if isinstance(sql, bytes):  # execute_batch sends pre-mogrified pages
+            sql = sql.decode("utf-8")
+        self.statements.append((sql, args))
+
+    def fetchall(self):
+        return []
+
+
+class _Conn:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def cursor(self):
+        return self._cur
+
+
+def test_upsert_takes_bounded_advisory_locks_for_large_batch():
+    cur = _RecordingCursor()
+    repo = PgRepo("postgresql://unused")
+
+    @contextmanager
+    def conn():
+        yield _Conn(cur)
+
+    repo._conn = conn
+    records = [
+        LicenseRecord("CA", f"C10-{i:07d}", "retailer", "active", f"Shop {i}", latitude=34.0, longitude=-118.2)
+        for i in range(12_000)
+    ]
+
+    assert repo.upsert_state_licenses(records) == 12_000
+
+    lock_calls = [args for sql, args in cur.statements if "pg_advisory_xact_lock" in sql]
+    assert len(lock_calls) == 1
+    (buckets,) = lock_calls[0]
+    assert 0 < len(buckets) <= LICENSE_LOCK_BUCKETS
+    assert buckets == sorted(set(buckets))
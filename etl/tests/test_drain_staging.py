@@ -0,0 +1,36 @@
+from etl.jobs.drain_staging import drain_staging
+from etl.staging import StagingLog
+
+
+class _Repo:
+    def __init__(self):
+        self.calls = []
+
+    def upsert_state_licenses(self, records):
+        self.calls.append(len(list(records)))
+
+
+def _rows(start, n):
+    return [
+        {
+            "state_code": "CA",
+            "license_number": f"C10-{i:07d}",
+            "license_type": "retailer",
+            "status": "active",
+            "entity_name": f"Shop {i}",
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def test_oversized_batch_is_split_into_bulk_rows_upserts(tmp_path):
+    repo = _Repo()
+    with StagingLog(str(tmp_path / "staging.db")) as staging:
+        staging.append("state_license", "test", _rows(0, 2500))
+        staging.append("state_license", "test", _rows(2500, 300))
+
+        assert drain_staging(staging, pg_repo=repo, bulk_rows=1000) == 2800
+        assert staging.pending_count() == 0
+
+    assert max(repo.calls) <= 1000
+    assert sum(repo.calls) == 2800
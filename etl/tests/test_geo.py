@@ -0,0 +1,47 @@
+import random
+
+from etl import geo
+
+
+def _aggregate(points):
+    clusters = {}
+    for geohash, lat, lng in points.values():
+        for p in range(1, geo.MAX_CLUSTER_PRECISION + 1):
+            c = clusters.setdefault((p, geohash[:p]), [0, 0.0, 0.0])
+            c[0] += 1
+            c[1] += lat
+            c[2] += lng
+    return clusters
+
+
+def test_cluster_deltas_match_full_rebuild():
+    rng = random.Random(0)
+
+    def point():
+        lat, lng = rng.uniform(30, 45), rng.uniform(-120, -70)
+        return geo.encode(lat, lng), lat, lng
+
+    points = {i: point() for i in range(500)}
+    table = _aggregate(points)
+
+    for _ in range(10):
+        moves = []
+        for _ in range(50):
+            key = rng.randrange(600)
+            new = point() if rng.random() < 0.8 or key not in points else points[key]
+            moves.append((points.get(key), new))
+            points[key] = new
+        for cell, (n, lat, lng) in geo.cluster_deltas(moves).items():
+            c = table.setdefault(cell, [0, 0.0, 0.0])
+            c[0] += n
+            c[1] += lat
+            c[2] += lng
+            if c[0] <= 0:
+                del table[cell]
+
+    expected = _aggregate(points)
+    assert set(table) == set(expected)
+    for cell, (n, lat, lng) in expected.items():
+        assert table[cell][0] == n
+        assert abs(table[cell][1] - lat) < 1e-6
+        assert abs(table[cell][2] - lng) < 1e-6
@@ -0,0 +1,67 @@
+import csv
+from contextlib import contextmanager
+
+from etl.reconcile import ReconcileThresholds, SeenKeys, reconcile_seen
+
+
+class _CopyCursor:
+    def __init__(self, fail_for=None):
+        self.copied = []
+        self.fail_for = fail_for
+        self._params = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        self._params = args
+
+    def copy_expert(self, sql, buf):
+        self.copied.append(buf.read())
+
+    def fetchone(self):
+        if self._params and self._params.get("source_system") == self.fail_for:
+            raise RuntimeError("connection reset")
+        return (1, 0)
+
+
+class _Repo:
+    def __init__(self, cur):
+        self._cur = cur
+
+    @contextmanager
+    def _conn(self):
+        class _C:
+            def cursor(_self):
+                return self._cur
+
+        yield _C()
+
+
+def _seen(keys_by_system):
+    seen = SeenKeys()
+    for system, keys in keys_by_system.items():
+        seen.keys[system] = set(keys)
+        seen.thresholds[system] = ReconcileThresholds()
+    return seen
+
+
+def test_empty_license_number_is_copied_as_quoted_empty_string():
+    cur = _CopyCursor()
+    reconcile_seen(_Repo(cur), _seen({"CA_DCC": [("CA", "")]}))
+
+    (payload,) = cur.copied
+    assert payload.strip() == '"CA",""'
+    assert list(csv.reader([payload.strip()])) == [["CA", ""]]
+
+
+def test_error_in_one_source_does_not_stop_the_rest():
+    cur = _CopyCursor(fail_for="CA_DCC")
+    results = reconcile_seen(_Repo(cur), _seen({"CA_DCC": [("CA", "1")], "MA_CCC": [("MA", "2")]}))
+
+    by_system = {r.source_system: r for r in results}
+    assert by_system["CA_DCC"].aborted == "connection reset"
+    assert by_system["MA_CCC"].aborted is None
@@ -0,0 +1,22 @@
+from etl.scheduler import EtlScheduler
+
+SOURCES = """
+- {id: ca-a, enabled: true, kind: license, endpoint: "https://a", source_system: CA_DCC}
+- {id: ca-b, enabled: true, kind: license, endpoint: "https://b", source_system: CA_DCC}
+- {id: ma, enabled: true, kind: license, endpoint: "https://c", source_system: MA_CCC}
+"""
+
+
+def test_shared_source_system_disables_reconcile(tmp_path, monkeypatch):
+    monkeypatch.delenv("ALGOLIA_APP_ID", raising=False)
+    config = tmp_path / "sources.yml"
+    config.write_text(SOURCES)
+
+    jobs = EtlScheduler(config_path=str(config))._build_jobs(
+        entity_repo=None, scraper=None, staging=None, changefeed=None
+    )
+
+    after_drain = {job.name: job.after_drain for job in jobs}
+    assert after_drain["etl:us:ca-a"] is None
+    assert after_drain["etl:us:ca-b"] is None
+    assert after_drain["etl:us:ma"] is not None
@@ -0,0 +1,248 @@
+# etl/workers.py
+"""
+Process-pool execution mode for CPU-bound ETL work.
+
+The ETL normally runs in one process under one event loop, so CSV
+parsing, field mapping and Pydantic validation are stuck on one core.
+This module partitions fetched sources into work units (row chunks) and
+spreads them across N worker processes:
+
+  parent:   fetch (threads, I/O)  ->  partition  ->  stage results
+  workers:  parse CSV / map rows / serialise   (pure CPU, no DB, no network)
+
+Workers return each unit as a ready-to-store JSON payload, so the parent
+only does one SQLite insert per unit as the single writer into the
+staging log; the usual drain then bulk-upserts them.
+
+Configured via:
+  - ETL_WORKERS          (default 1 = in-process, no pool)
+  - ETL_WORKER_CHUNK_ROWS (default 5000 rows per work unit)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .models import LicenseEntity
+    from .reconcile import SeenKeys
+    from .staging import StagingLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 5000
+
+
+def etl_worker_count() -> int:
+    return max(1, int(os.getenv("ETL_WORKERS", "1")))
+
+
+def _chunk_rows_setting() -> int:
+    return max(1, int(os.getenv("ETL_WORKER_CHUNK_ROWS", DEFAULT_CHUNK_ROWS)))
+
+
+@dataclass
+class WorkUnit:
+    """
+    One chunk of a source, small enough to pickle cheaply to a worker.
+
+    `payload` is raw CSV text (header + rows) for kind="csv", or a list
+    of already-decoded JSON rows for kind="rows".
+    """
+
+    source: Dict[str, Any]
+    kind: Literal["csv", "rows"]
+    payload: Union[str, List[Dict[str, Any]]]
+    seq: int
+
+
+@dataclass
+class UnitResult:
+    """
+    A mapped work unit, already serialised for StagingLog.append_serialized().
+
+    `keys` are the (source_system, stateCode, licenseNumber) triples the
+    reconciler needs, so the parent never decodes `payload`.
+    """
+
+    source_id: str
+    seq: int
+    payload: str
+    rows: int
+    keys: List[Tuple[str, str, str]]
+
+
+def split_csv(text: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> List[str]:
+    """
+    Split CSV text into chunks of ~chunk_rows records, each with the header.
+
+    Only splits on newlines outside quoted fields (even quote count so
+    far), so multi-line quoted values stay intact without a full parse.
+    Records end at "\n" only: str.splitlines() would also break on
+    \r, \x1c-\x1e, \x85 and \u2028 inside a value and corrupt the row.
+    """
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    if not lines:
+        return []
+
+    header, body = lines[0], lines[1:]
+    chunks: List[str] = []
+    current: List[str] = []
+    records = 0
+    quotes = 0
+
+    for line in body:
+        current.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # inside a quoted field that spans lines
+        records += 1
+        if records >= chunk_rows:
+            chunks.append(header + "".join(current))
+            current, records, quotes = [], 0, 0
+
+    if current:
+        chunks.append(header + "".join(current))
+    return chunks
+
+
+def partition_source(
+    source: Dict[str, Any],
+    text: str,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> List[WorkUnit]:
+    """
+    Cut one fetched source into work units.
+
+    CSV stays as text so the parsing itself happens in the workers; JSON
+    is decoded here (one C-level json.loads) and chunked by rows.
+    """
+    if source.get("source_type") == "csv":
+        return [
+            WorkUnit(source=source, kind="csv", payload=chunk, seq=i)
+            for i, chunk in enumerate(split_csv(text, chunk_rows))
+        ]
+
+    payload = json.loads(text)
+    if isinstance(payload, dict):
+        payload = payload.get("results", [])
+    return [
+        WorkUnit(source=source, kind="rows", payload=payload[i : i + chunk_rows], seq=n)
+        for n, i in enumerate(range(0, len(payload), chunk_rows))
+    ]
+
+
+# ----------------------------------------------------------------------
+# Worker-side functions (must be top-level so they pickle)
+# ----------------------------------------------------------------------
+
+
+def process_unit(unit: WorkUnit) -> UnitResult:
+    """
+    Parse, map and serialise one work unit of LicenseRecords.
+    """
+    from .jobs.sync_us_licenses import _map_row_to_license, _parse_payload
+    from .staging import serialize_rows
+
+    if unit.kind == "csv":
+        rows = _parse_payload(unit.source, unit.payload)  # type: ignore[arg-type]
+    else:
+        rows = unit.payload  # type: ignore[assignment]
+    records = [_map_row_to_license(unit.source, r) for r in rows]
+    payload, count = serialize_rows(records)
+    keys = [(r.source_system, r.state_code, r.license_number) for r in records if r.source_system]
+    return UnitResult(source_id=unit.source["id"], seq=unit.seq, payload=payload, rows=count, keys=keys)
+
+
+def _map_wa_chunk(csv_chunk: str) -> Tuple[List["LicenseEntity"], List[Tuple[Dict[str, str], str]]]:
+    from .mappers import map_wa_rows
+
+    return map_wa_rows(csv_chunk)
+
+
+# ----------------------------------------------------------------------
+# Parent-side drivers
+# ----------------------------------------------------------------------
+
+
+def run_units(units: List[WorkUnit], *, workers: int) -> Iterator[UnitResult]:
+    """
+    Yield process_unit() results as workers finish them (unordered).
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_unit, u) for u in units]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def run_us_sources_parallel(
+    sources: List[Dict[str, Any]],
+    staging: "StagingLog",
+    *,
+    workers: int,
+    chunk_rows: int = 0,
+    seen: Optional["SeenKeys"] = None,
+) -> int:
+    """
+    Fetch all sources concurrently, then map them across `workers` processes.
+
+    The parent stays the only writer: each finished unit's payload is
+    appended to the staging log as-is, as its own batch. Returns the
+    number of rows staged.
+    Staged keys are also collected into `seen` for reconciliation.
+    """
+    from .jobs.sync_us_licenses import _fetch_raw
+
+    chunk_rows = chunk_rows or _chunk_rows_setting()
+
+    units: List[WorkUnit] = []
+    with ThreadPoolExecutor(max_workers=min(len(sources), 8) or 1) as io_pool:
+        fetched = list(io_pool.map(_fetch_raw, sources))
+    for src, text in zip(sources, fetched):
+        src_units = partition_source(src, text, chunk_rows=chunk_rows)
+        logger.info("Partitioned %s into %d work units", src["id"], len(src_units))
+        units.extend(src_units)
+
+    by_id = {src["id"]: src for src in sources}
+    if seen is not None:
+        for src in sources:
+            seen.add(src, [])
+
+    staged = 0
+    for result in run_units(units, workers=workers):
+        staging.append_serialized("state_license", f"{result.source_id}#{result.seq}", result.payload, result.rows)
+        if seen is not None:
+            seen.add_keys(by_id[result.source_id], result.keys)
+        staged += result.rows
+
+    logger.info("Mapped %d rows from %d sources on %d workers", staged, len(sources), workers)
+    return staged
+
+
+def map_wa_csv_parallel(
+    csv_text: str,
+    *,
+    workers: int,
+    chunk_rows: int = 0,
+) -> Tuple[List["LicenseEntity"], List[Tuple[Dict[str, str], str]]]:
+    """
+    Process-pool version of etl.mappers.map_wa_rows(); same return shape.
+    """
+    chunks = split_csv(csv_text, chunk_rows or _chunk_rows_setting())
+
+    licenses: List["LicenseEntity"] = []
+    failed: List[Tuple[Dict[str, str], str]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for ok, bad in pool.map(_map_wa_chunk, chunks):
+            licenses.extend(ok)
+            failed.extend(bad)
+    return licenses, failed
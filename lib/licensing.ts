@@ -59,33 +59,30 @@ const prisma = new PrismaClient({ adapter });
  */
 export async function upsertLicenseRecord(data: LicenseInput): Promise<void> {
   try {
-    // Step 1: Upsert the StateLicense record (find by stateCode + licenseNumber).
-    const existing = await prisma.stateLicense.findFirst({
-      where: { stateCode: data.stateCode, licenseNumber: data.licenseNumber }
-    });
+    // Step 1: Upsert the StateLicense record (unique on stateCode + licenseNumber).
     // Prepare the data for creation or update (include all fields provided in input).
     const licenseData: any = {
       stateCode: data.stateCode,
       licenseNumber: data.licenseNumber,
       licenseType: data.licenseType,
       status: data.status,
-      entityName: data.entityName
+      entityName: data.entityName,
+      // Seen in the feed again: undo any ETL "missing_from_source" mark.
+      missingSince: null
     };
     if (data.issuedAt)    licenseData.issuedAt    = data.issuedAt;
     if (data.expiresAt)   licenseData.expiresAt   = data.expiresAt;
     if (data.sourceUrl)   licenseData.sourceUrl   = data.sourceUrl;
     if (data.sourceSystem) licenseData.sourceSystem = data.sourceSystem;
     if (data.rawData)     licenseData.rawData     = data.rawData;
-    // Create a new license if not found, otherwise update the existing one.
-    let licenseRecord;
-    if (!existing) {
-      licenseRecord = await prisma.stateLicense.create({ data: licenseData });
-    } else {
-      licenseRecord = await prisma.stateLicense.update({
-        where: { id: existing.id },
-        data: licenseData
-      });
-    }
+    // Single atomic upsert: a findFirst + create could race and insert duplicates.
+    const licenseRecord = await prisma.stateLicense.upsert({
+      where: {
+        stateCode_licenseNumber: { stateCode: data.stateCode, licenseNumber: data.licenseNumber }
+      },
+      create: licenseData,
+      update: licenseData
+    });
 
     // Step 2: Determine license type and link to appropriate model (Lab or Location).
     const licenseTypeLower = data.licenseType.toLowerCase();
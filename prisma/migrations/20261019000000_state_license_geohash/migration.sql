@@ -0,0 +1,17 @@
+-- AlterTable
+-- "C" collation so every geohash prefix is one contiguous btree range.
+ALTER TABLE "StateLicense" ADD COLUMN     "geohash" TEXT COLLATE "C";
+
+-- CreateTable
+CREATE TABLE "StateLicenseGeoCluster" (
+    "precision" INTEGER NOT NULL,
+    "geohash" TEXT COLLATE "C" NOT NULL,
+    "count" INTEGER NOT NULL,
+    "latitude" DOUBLE PRECISION NOT NULL,
+    "longitude" DOUBLE PRECISION NOT NULL,
+
+    CONSTRAINT "StateLicenseGeoCluster_pkey" PRIMARY KEY ("precision","geohash")
+);
+
+-- CreateIndex
+CREATE INDEX "StateLicense_geohash_idx" ON "StateLicense"("geohash");
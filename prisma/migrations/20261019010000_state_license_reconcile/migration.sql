@@ -0,0 +1,38 @@
+-- AlterTable
+ALTER TABLE "StateLicense" ADD COLUMN     "missingSince" TIMESTAMP(3);
+
+-- Dedupe (stateCode, licenseNumber) before the unique index below:
+-- lib/licensing.ts used findFirst + create, so concurrent requests could
+-- insert the same licence twice. The most recently updated row is kept;
+-- Location / Lab references to the others are moved onto it first.
+CREATE TEMP TABLE "_StateLicenseDuplicate" AS
+SELECT "id", "keepId"
+FROM (
+    SELECT "id",
+           first_value("id") OVER (
+               PARTITION BY "stateCode", "licenseNumber"
+               ORDER BY "updatedAt" DESC, "id" DESC
+           ) AS "keepId"
+    FROM "StateLicense"
+) d
+WHERE "id" <> "keepId";
+
+UPDATE "Location" l SET "stateLicenseId" = d."keepId"
+FROM "_StateLicenseDuplicate" d
+WHERE l."stateLicenseId" = d."id";
+
+UPDATE "Lab" l SET "stateLicenseId" = d."keepId"
+FROM "_StateLicenseDuplicate" d
+WHERE l."stateLicenseId" = d."id";
+
+DELETE FROM "StateLicense" s
+USING "_StateLicenseDuplicate" d
+WHERE s."id" = d."id";
+
+DROP TABLE "_StateLicenseDuplicate";
+
+-- CreateIndex
+CREATE UNIQUE INDEX "StateLicense_stateCode_licenseNumber_key" ON "StateLicense"("stateCode", "licenseNumber");
+
+-- CreateIndex
+CREATE INDEX "StateLicense_sourceSystem_missingSince_idx" ON "StateLicense"("sourceSystem", "missingSince");
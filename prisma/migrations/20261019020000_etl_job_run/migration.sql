@@ -0,0 +1,7 @@
+-- CreateTable
+CREATE TABLE "EtlJobRun" (
+    "name" TEXT NOT NULL,
+    "lastFinishedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "EtlJobRun_pkey" PRIMARY KEY ("name")
+);
@@ -0,0 +1,24 @@
+-- CreateTable
+CREATE TABLE "SearchIndexState" (
+    "objectID" TEXT NOT NULL,
+    "fingerprint" TEXT NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "SearchIndexState_pkey" PRIMARY KEY ("objectID")
+);
+
+-- CreateTable
+CREATE TABLE "SearchChangeLog" (
+    "seq" BIGSERIAL NOT NULL,
+    "objectID" TEXT NOT NULL,
+    "op" TEXT NOT NULL,
+    "fingerprint" TEXT,
+    "payload" JSONB,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "publishedAt" TIMESTAMP(3),
+
+    CONSTRAINT "SearchChangeLog_pkey" PRIMARY KEY ("seq")
+);
+
+-- CreateIndex
+CREATE INDEX "SearchChangeLog_publishedAt_seq_idx" ON "SearchChangeLog"("publishedAt", "seq");
@@ -0,0 +1,7 @@
+-- AlterTable
+-- Running sums let the ETL apply per-upsert deltas instead of re-aggregating cells.
+ALTER TABLE "StateLicenseGeoCluster" ADD COLUMN     "latitudeSum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+ADD COLUMN     "longitudeSum" DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+-- Backfill the sums of existing clusters from their centroids.
+UPDATE "StateLicenseGeoCluster" SET "latitudeSum" = "latitude" * "count", "longitudeSum" = "longitude" * "count";